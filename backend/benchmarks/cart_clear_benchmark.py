@@ -0,0 +1,63 @@
+"""
+Clearing a cart: one set-based DELETE (CartRepository.delete_items) against
+deleting each loaded line through the session, for small and large carts.
+The lines are loaded into the session first, as checkout does.
+
+    python -m benchmarks.cart_clear_benchmark [runs]
+"""
+import sys
+
+from benchmarks.common import benchmark_app, median_ms
+from database.db import db
+from models.cart import Cart
+from models.cart_item import CartItem
+from models.product import Product
+from models.user import User
+from repositories.cart_repository import CartRepository
+
+SIZES = (1, 200)
+
+
+def fill_cart(cart, products, lines):
+    """Give the cart `lines` lines and load them into the session"""
+    db.session.add_all(
+        CartItem(cart_id=cart.id, product_id=product.id, quantity=1)
+        for product in products[:lines])
+    db.session.commit()
+    cart.items  # noqa: B018
+
+
+def clear_per_row(cart):
+    for item in list(cart.items):
+        db.session.delete(item)
+    db.session.commit()
+
+
+def clear_set_based(cart):
+    CartRepository().delete_items(cart)
+    db.session.commit()
+
+
+def main(runs=50):
+    app = benchmark_app()
+    with app.app_context():
+        user = User('Benchmark', 'benchmark@example.com', 'password')
+        products = [Product(f'Product {n}', 'desc', 1.0, 1000)
+                    for n in range(max(SIZES))]
+        db.session.add_all([user, *products])
+        db.session.commit()
+        cart = Cart(user_id=user.id)
+        db.session.add(cart)
+        db.session.commit()
+
+        for lines in SIZES:
+            for name, clear in (('per-row', clear_per_row),
+                                ('set-based', clear_set_based)):
+                elapsed = median_ms(
+                    lambda: clear(cart), runs,
+                    setup=lambda: fill_cart(cart, products, lines))
+                print(f"{lines:>4} lines  {name:<10} {elapsed:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,85 @@
+"""
+Many customers checking out at once against the stand-in gateway: reports
+checkouts per second and how the payments ended (paid, pending on a
+gateway timeout, refunded after a failure past authorization).
+
+    python -m benchmarks.checkout_throughput_benchmark [customers] [latency]
+
+latency is PAYMENT_GATEWAY_LATENCY in seconds (default 1.0). Point
+BENCHMARK_DATABASE_URL at Postgres to measure without SQLite's single
+write lock.
+"""
+import sys
+import threading
+import time
+
+from benchmarks.common import benchmark_app
+from database.db import db
+from models.order import Order
+from models.payment import Payment
+from models.product import Product
+from models.user import User
+from utils.jwt_handler import JWTHandler
+
+ADDRESS = {'street': '1 Main St', 'city': 'Springfield', 'state': 'IL',
+           'postal_code': '62701', 'country': 'US'}
+CARD = {'card_number': '4111111111111111', 'expiry': '12/30', 'cvv': '123',
+        'cardholder_name': 'Customer'}
+
+
+def main(customers=100, latency=1.0):
+    app = benchmark_app(PAYMENT_GATEWAY_LATENCY=latency)
+    with app.app_context():
+        product = Product('Apples', 'desc', 1.5, customers * 10)
+        users = [User(f'Customer {i}', f'customer{i}@example.com', 'password')
+                 for i in range(customers)]
+        db.session.add_all([product] + users)
+        db.session.commit()
+        headers = [{'Authorization': 'Bearer ' + JWTHandler.create_access_token(
+            {'user_id': user.id})} for user in users]
+        product_id = product.id
+
+    client = app.test_client()
+    for auth in headers:
+        client.post('/api/cart/add', headers=auth,
+                    json={'product_id': product_id, 'quantity': 2})
+
+    codes = []
+    barrier = threading.Barrier(customers)
+
+    def checkout(i):
+        client = app.test_client()
+        barrier.wait()
+        response = client.post(
+            '/api/orders/checkout',
+            headers={**headers[i], 'Idempotency-Key': f'benchmark-{i:06d}'},
+            json={'shipping_address': ADDRESS, 'billing_address': ADDRESS,
+                  'payment_details': CARD})
+        codes.append(response.status_code)
+
+    threads = [threading.Thread(target=checkout, args=(i,))
+               for i in range(customers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        paid = db.session.scalar(db.select(db.func.count(Order.id)).where(
+            Order.status == 'paid'))
+        payments = dict(db.session.execute(
+            db.select(Payment.status, db.func.count(Payment.id))
+            .group_by(Payment.status)).all())
+    responses = {code: codes.count(code) for code in sorted(set(codes))}
+    print(f"{customers} concurrent checkouts, gateway latency {latency}s: "
+          f"{elapsed:.2f}s ({customers / elapsed:.1f} checkouts/s), "
+          f"paid {paid}, pending {payments.get('pending', 0)}, "
+          f"refunded {payments.get('refunded', 0)}, "
+          f"responses {responses}")
+
+
+if __name__ == '__main__':
+    main(*[convert(arg)
+           for convert, arg in zip((int, float), sys.argv[1:3])])
@@ -0,0 +1,49 @@
+"""
+Shared setup for the benchmark scripts: an app on a throwaway database
+(a temporary SQLite file unless BENCHMARK_DATABASE_URL is set), with the
+background jobs left off
+"""
+import os
+import statistics
+import tempfile
+import time
+
+# main builds its module-level app from the environment on import
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from config import Config  # noqa: E402
+from database.db import db  # noqa: E402
+from main import create_app  # noqa: E402
+
+
+def benchmark_app(**overrides):
+    """Create the app with its tables on a fresh database"""
+    url = os.getenv('BENCHMARK_DATABASE_URL')
+    if not url:
+        path = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+        # Concurrent writers wait for SQLite's database lock
+        url = f'sqlite:///{path}?timeout=60'
+
+    config = type('BenchmarkConfig', (Config,), {
+        'SQLALCHEMY_DATABASE_URI': url,
+        'BACKGROUND_JOBS_IN_WEB': False,
+        **overrides,
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def median_ms(fn, runs, setup=None):
+    """Median wall time of fn() over runs, in milliseconds; setup() runs
+    untimed before each call"""
+    timings = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
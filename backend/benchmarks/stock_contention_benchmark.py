@@ -0,0 +1,69 @@
+"""
+Many buyers reserving the last units of one product at once: checks that
+stock is never oversold and reports the throughput of
+InventoryService.reserve_items under contention.
+
+    python -m benchmarks.stock_contention_benchmark [buyers] [stock]
+
+Point BENCHMARK_DATABASE_URL at Postgres for row-level locking; on SQLite
+every reservation takes the database write lock.
+"""
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+from benchmarks.common import benchmark_app
+from database.db import db, unit_of_work
+from models.product import Product
+from repositories.product_repository import ProductRepository
+from services.inventory_service import InventoryService
+
+
+def main(buyers=200, stock=50):
+    app = benchmark_app()
+    with app.app_context():
+        product = Product('Limited edition', 'desc', 9.99, stock)
+        db.session.add(product)
+        db.session.commit()
+        product_id = product.id
+
+    results = []
+    barrier = threading.Barrier(buyers)
+
+    def buy():
+        with app.app_context():
+            service = InventoryService(ProductRepository())
+            barrier.wait()
+            try:
+                with unit_of_work():
+                    result = service.reserve_items(
+                        [SimpleNamespace(product_id=product_id, quantity=1)])
+                results.append(result['success'])
+            except Exception as e:
+                results.append(repr(e))
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=buy) for _ in range(buyers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        final_stock = db.session.get(Product, product_id).stock
+    sold = results.count(True)
+    errors = [r for r in results if not isinstance(r, bool)]
+    print(f"{buyers} buyers, stock {stock}: sold {sold}, "
+          f"refused {results.count(False)}, errors {len(errors)}, "
+          f"final stock {final_stock}, oversold {max(0, sold - stock)}, "
+          f"{elapsed:.2f}s ({buyers / elapsed:.0f} reservations/s)")
+    for error in errors[:3]:
+        print(f"  {error}")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
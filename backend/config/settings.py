@@ -8,4 +8,96 @@ load_dotenv()  # load .env file
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret")
\ No newline at end of file
+    SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret")
+
+    # Catalog response cache (per process)
+    CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "30"))
+    CATALOG_CACHE_MAX_ENTRIES = int(
+        os.getenv("CATALOG_CACHE_MAX_ENTRIES", "512"))
+
+    # In-memory search index (SQLite only): rebuilt from the database after
+    # this many seconds so writes made by other processes show up
+    SEARCH_INDEX_TTL = int(os.getenv("SEARCH_INDEX_TTL", "60"))
+
+    # Rows per transaction for bulk product imports
+    PRODUCT_IMPORT_BATCH_SIZE = int(
+        os.getenv("PRODUCT_IMPORT_BATCH_SIZE", "1000"))
+
+    # Background workers generating resized product image variants
+    IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+    # Hand product image bytes to the front proxy instead of streaming them
+    # from Flask: "" (serve directly), "x-accel-redirect" (nginx) or
+    # "x-sendfile" (Apache/lighttpd)
+    IMAGE_OFFLOAD = os.getenv("IMAGE_OFFLOAD", "")
+    IMAGE_ACCEL_PREFIX = os.getenv(
+        "IMAGE_ACCEL_PREFIX", "/protected/product_images/")
+    USE_X_SENDFILE = IMAGE_OFFLOAD == "x-sendfile"
+
+    # Start the enabled background jobs in the web process on its first
+    # request. Set to false when they run in their own process instead
+    # (`flask run-jobs`)
+    BACKGROUND_JOBS_IN_WEB = os.getenv(
+        "BACKGROUND_JOBS_IN_WEB", "true").lower() == "true"
+
+    # Inventory holds taken at checkout and the sweeper releasing expired ones
+    RESERVATION_TTL_MINUTES = int(os.getenv("RESERVATION_TTL_MINUTES", "30"))
+    RESERVATION_SWEEP_INTERVAL = int(
+        os.getenv("RESERVATION_SWEEP_INTERVAL", "60"))
+    RESERVATION_SWEEP_BATCH_SIZE = int(
+        os.getenv("RESERVATION_SWEEP_BATCH_SIZE", "500"))
+    RESERVATION_SWEEPER_ENABLED = os.getenv(
+        "RESERVATION_SWEEPER_ENABLED", "true").lower() == "true"
+
+    # Payment gateway calls: worker threads, calls allowed in flight at once
+    # (extra checkouts wait up to the timeout for a slot) and per-call timeout
+    PAYMENT_WORKERS = int(os.getenv("PAYMENT_WORKERS", "32"))
+    PAYMENT_MAX_IN_FLIGHT = int(os.getenv("PAYMENT_MAX_IN_FLIGHT", "64"))
+    PAYMENT_TIMEOUT_SECONDS = float(os.getenv("PAYMENT_TIMEOUT_SECONDS", "10"))
+    # Payments left pending by a timed-out gateway call are settled through
+    # the gateway this often (once older than twice the call timeout)
+    PAYMENT_RECONCILE_ENABLED = os.getenv(
+        "PAYMENT_RECONCILE_ENABLED", "true").lower() == "true"
+    PAYMENT_RECONCILE_INTERVAL = int(
+        os.getenv("PAYMENT_RECONCILE_INTERVAL", "30"))
+    PAYMENT_RECONCILE_BATCH_SIZE = int(
+        os.getenv("PAYMENT_RECONCILE_BATCH_SIZE", "100"))
+    # Simulated latency of the local stand-in gateway (MockPaymentStrategy)
+    PAYMENT_GATEWAY_LATENCY = float(os.getenv("PAYMENT_GATEWAY_LATENCY", "1.0"))
+
+    # Invoice and receipt numbers reserved per database round trip
+    NUMBER_BLOCK_SIZE = int(os.getenv("NUMBER_BLOCK_SIZE", "50"))
+
+    # Outbox workers delivering post-checkout notifications
+    OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").lower() == "true"
+    OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "2"))
+    OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "2"))
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+    OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    # Delivered events are kept this long, then deleted in batches at most
+    # once per purge interval
+    OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+    OUTBOX_PURGE_INTERVAL = int(os.getenv("OUTBOX_PURGE_INTERVAL", "3600"))
+    OUTBOX_PURGE_BATCH_SIZE = int(
+        os.getenv("OUTBOX_PURGE_BATCH_SIZE", "1000"))
+
+    # Idempotency keys: completed responses cached per process, how long a
+    # duplicate waits for an in-flight request, and when a claim left by a
+    # crashed request may be taken over
+    IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    IDEMPOTENCY_WAIT_SECONDS = float(
+        os.getenv("IDEMPOTENCY_WAIT_SECONDS", "15"))
+    IDEMPOTENCY_CLAIM_TIMEOUT = int(
+        os.getenv("IDEMPOTENCY_CLAIM_TIMEOUT", "120"))
+    IDEMPOTENCY_TTL_DAYS = int(os.getenv("IDEMPOTENCY_TTL_DAYS", "7"))
+    # Purge of expired keys: run interval, rows per batch (one commit each)
+    # and batches per run
+    IDEMPOTENCY_PURGE_ENABLED = os.getenv(
+        "IDEMPOTENCY_PURGE_ENABLED", "true").lower() == "true"
+    IDEMPOTENCY_PURGE_INTERVAL = int(
+        os.getenv("IDEMPOTENCY_PURGE_INTERVAL", "3600"))
+    IDEMPOTENCY_PURGE_BATCH_SIZE = int(
+        os.getenv("IDEMPOTENCY_PURGE_BATCH_SIZE", "1000"))
+    IDEMPOTENCY_PURGE_MAX_BATCHES = int(
+        os.getenv("IDEMPOTENCY_PURGE_MAX_BATCHES", "100"))
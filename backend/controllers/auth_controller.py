@@ -2,10 +2,10 @@ from flask import Blueprint, g, jsonify, request
 
 from middleware.auth_middleware import auth_middleware
 from repositories.user_repository import UserRepository
-from services.auth_service import AuthService
+from services.container import get_service
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
-auth_service = AuthService(UserRepository())
+auth_service = get_service('auth_service')
 
 
 @auth_bp.route("/register", methods=["POST"])
@@ -1,13 +1,11 @@
 from flask import Blueprint, jsonify, request, g
 
 from middleware.auth_middleware import auth_middleware
-from repositories.cart_repository import CartRepository
-from repositories.product_repository import ProductRepository
-from services.cart_service import CartService
+from services.container import get_service
 
 cart_bp = Blueprint("cart", __name__, url_prefix="/api/cart")
 
-cart_service = CartService(CartRepository(), ProductRepository())
+cart_service = get_service('cart_service')
 
 
 @cart_bp.route("", methods=["GET"])
@@ -20,6 +18,13 @@ def view_cart():
         return jsonify({"error": str(e)}), 404
 
 
+@cart_bp.route("/summary", methods=["GET"])
+@auth_middleware
+def cart_summary():
+    """Item count and total only, answered from a single row"""
+    return jsonify(cart_service.get_summary(g.user.id)), 200
+
+
 @cart_bp.route("/add", methods=["POST"])
 @auth_middleware
 def add_to_cart():
@@ -45,3 +50,21 @@ def remove_from_cart():
                        "cart": cart.to_dict()}), 200
     except (KeyError, ValueError) as e:
         return jsonify({"error": str(e)}), 400
+
+
+@cart_bp.route("/batch", methods=["POST"])
+@auth_middleware
+def batch_update_cart():
+    """
+    Apply several cart operations in one request, e.g.
+    {"operations": [{"op": "add", "product_id": 1, "quantity": 2},
+                    {"op": "set", "product_id": 2, "quantity": 5},
+                    {"op": "remove", "item_id": 7}]}
+    """
+    data = request.json or {}
+    try:
+        cart = cart_service.apply_batch(g.user.id, data.get("operations"))
+        return jsonify({"message": "Cart updated",
+                       "cart": cart.to_dict()}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
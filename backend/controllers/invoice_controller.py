@@ -1,10 +1,10 @@
 from flask import Blueprint, g, jsonify
 from middleware.auth_middleware import auth_middleware
-from services.invoice_service import InvoiceService
-from repositories.invoice_repository import InvoiceRepository
-from services.notification_service import NotificationService
+from services.container import get_service
+from utils.http_cache import make_etag, conditional_json
 
 invoice_bp = Blueprint('invoices', __name__, url_prefix='/api/invoices')
+invoice_service = get_service('invoice_service')
 
 
 @invoice_bp.route('/orders/<int:order_id>/invoice', methods=['GET'])
@@ -13,11 +13,6 @@ def get_order_invoice(order_id):
     try:
         current_user_id = g.user_id
 
-        invoice_service = InvoiceService(
-            InvoiceRepository(),
-            NotificationService()
-        )
-
         invoice = invoice_service.get_invoice_by_order(order_id)
         if not invoice:
             return jsonify({'error': 'Invoice not found'}), 404
@@ -26,7 +21,9 @@ def get_order_invoice(order_id):
         if invoice.order.user_id != current_user_id:
             return jsonify({'error': 'Unauthorized'}), 403
 
-        return jsonify(invoice.to_dict()), 200
+        # Only the status of an issued invoice can change
+        etag = make_etag('invoice', invoice.id, invoice.status)
+        return conditional_json(etag, invoice.to_dict)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -38,11 +35,6 @@ def resend_invoice(invoice_id):
     try:
         current_user_id = g.user_id
 
-        invoice_service = InvoiceService(
-            InvoiceRepository(),
-            NotificationService()
-        )
-
         # Get invoice to check ownership
         invoice = invoice_service.invoice_repository.get_by_id(invoice_id)
         if not invoice:
@@ -2,19 +2,12 @@ from flask import Blueprint, g, jsonify, request
 
 from middleware.auth_middleware import auth_middleware
 from middleware.admin_middleware import admin_required
-from repositories.order_repository import OrderRepository
-from repositories.product_repository import ProductRepository
-from repositories.invoice_repository import InvoiceRepository
-from services.order_service import OrderService
-from services.checkout_service import CheckoutService
-from services.inventory_service import InventoryService
-from services.payment_service import PaymentService
-from services.invoice_service import InvoiceService
-from services.receipt_service import ReceiptService
-from services.notification_service import NotificationService
+from services.container import get_service
+from utils.http_cache import hashed_json
 
 order_bp = Blueprint("order", __name__, url_prefix="/api/orders")
-order_service = OrderService(OrderRepository())
+order_service = get_service('order_service')
+checkout_service = get_service('checkout_service')
 
 
 @order_bp.route("", methods=["POST"])
@@ -26,7 +19,7 @@ def create_order():
     # Get user's cart
     from repositories.cart_repository import CartRepository
     cart_repo = CartRepository()
-    cart = cart_repo.get_cart(user_id)
+    cart = cart_repo.get_cart_with_items(user_id)
 
     if not cart or not cart.items:
         return jsonify({"error": "Cart is empty"}), 400
@@ -71,7 +64,8 @@ def get_order(order_id):
     if order.user_id != user_id and user.user_type != 'admin':
         return jsonify({"error": "Access denied"}), 403
 
-    return jsonify(order.to_dict())
+    # The body embeds the payment and live product rows
+    return hashed_json(order.to_dict)
 
 
 @order_bp.route("", methods=["GET"])
@@ -190,7 +184,7 @@ def checkout():
         # Get user's cart
         from repositories.cart_repository import CartRepository
         cart_repo = CartRepository()
-        cart = cart_repo.get_cart(current_user_id)
+        cart = cart_repo.get_cart_with_items(current_user_id)
 
         if not cart:
             return jsonify({'error': 'Cart not found'}), 404
@@ -205,24 +199,33 @@ def checkout():
         if address_errors:
             return jsonify({'errors': address_errors}), 400
 
-        # Initialize services
-        checkout_service = CheckoutService(
-            inventory_service=InventoryService(ProductRepository()),
-            payment_service=PaymentService(),
-            invoice_service=InvoiceService(
-                InvoiceRepository(), NotificationService()),
-            receipt_service=ReceiptService(NotificationService()),
-            notification_service=NotificationService(),
-            order_repository=OrderRepository(),
-            payment_repository=None  # Not needed for now
-        )
-
         # Process checkout
         result = checkout_service.process_checkout(
             cart, shipping_address, billing_address,
             payment_details, current_user_id, idempotency_key
         )
 
+        if result.get('replayed'):
+            # Same response as the request that first used this key
+            status_code = result.pop('status_code', None) or 200
+            result.pop('replayed')
+            return jsonify(result), status_code
+        if result.get('in_progress'):
+            return jsonify({'success': False, 'error': result['error']}), 409
+        if result.get('conflict'):
+            return jsonify({'success': False, 'error': result['error']}), 422
+        if result.get('pending'):
+            # Gateway outcome unknown; settled by the payment reconciler
+            return jsonify({
+                'success': False,
+                'pending': True,
+                'error': result['error'],
+                'order_id': result['order_id']
+            }), 202
+        if result.get('retry'):
+            # The gateway was never called; retry with the same key
+            return jsonify({'success': False, 'error': result['error']}), 503
+
         if result['success']:
             return jsonify({
                 'success': True,
@@ -1,34 +1,130 @@
-from flask import Blueprint, jsonify, request
-from repositories.product_repository import ProductRepository
-from services.product_service import ProductService
-from services.notification_service import NotificationService
+from flask import Blueprint, current_app, jsonify, request
+from services.container import get_service
 from middleware.admin_middleware import admin_required
 from utils.image_handler import allowed_file
+from utils.pagination import encode_cursor, decode_cursor
+from utils.http_cache import make_etag, not_modified
 
 product_bp = Blueprint("product", __name__, url_prefix="/api/products")
 
-# Initialize services
-product_service = ProductService(ProductRepository())
-notification_service = NotificationService()
-
-# Attach notification service as observer
-product_service.attach(notification_service)
+# Shared services (the container attaches the notification observer)
+product_service = get_service('product_service')
+import_service = get_service('product_import_service')
+catalog_cache = get_service('catalog_cache')
 
 
 @product_bp.route("/categories", methods=["GET"])
 def get_categories():
-    categories = product_service.get_all_categories()
-    return jsonify(categories), 200
+    """
+    List active categories. With with_counts=true each entry also carries
+    product_count, min_price and max_price.
+    """
+    if request.args.get('with_counts', 'false').lower() == 'true':
+        return _cached_json(('categories', 'with_counts'),
+                            product_service.get_category_summaries)
+    return _cached_json(('categories',), product_service.get_all_categories)
 
 
 @product_bp.route("/", methods=["GET"])
 def get_all_products():
-    category = request.args.get('category')
-    include_inactive = request.args.get(
-        'include_inactive', 'false').lower() == 'true'
-    products = product_service.get_all_products(
-        category=category, include_inactive=include_inactive)
-    return jsonify([p.to_dict() for p in products]), 200
+    """
+    List products. Query params:
+    - category, include_inactive, min_price, max_price
+    - sort: id (default), name, price or -price
+    - limit, cursor (or after_id when sorting by id)
+    Without limit/cursor/after_id the full filtered list is returned as an
+    array; otherwise a page is returned together with its next_cursor.
+    """
+    key = ('products', tuple(sorted(request.args.items(multi=True))))
+    try:
+        return _cached_json(key, lambda: _list_products(request.args))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+
+@product_bp.route("/search", methods=["GET"])
+def search_products():
+    """
+    Ranked search over product names and descriptions.
+    Query params: q (required), limit, offset. The last word of q also
+    matches as a prefix, so this can back autocomplete.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'message': 'Query parameter q is required'}), 400
+
+    offset = request.args.get('offset', 0, type=int)
+    products, total = product_service.search_products(
+        query,
+        limit=request.args.get('limit', type=int),
+        offset=offset)
+
+    next_offset = offset + len(products)
+    return jsonify({
+        'products': [p.to_dict() for p in products],
+        'total': total,
+        'next_offset': next_offset if next_offset < total else None
+    }), 200
+
+
+@product_bp.route("/cache/stats", methods=["GET"])
+@admin_required
+def get_catalog_cache_stats():
+    """Catalog cache hit/miss counters for this process"""
+    return jsonify(catalog_cache.stats()), 200
+
+
+def _cached_json(key, build):
+    """
+    Serve a JSON body from the catalog cache, building it on a miss.
+    The ETag is a hash of the cached body, so it is computed once per cache
+    fill and stays consistent across worker processes.
+    """
+    def load():
+        body = current_app.json.dumps(build())
+        return body, make_etag(body)
+
+    body, etag = catalog_cache.get_or_set(key, load)
+    response = not_modified(etag)
+    if response is None:
+        response = current_app.response_class(
+            body, mimetype='application/json')
+        response.set_etag(etag)
+    return response
+
+
+def _list_products(args):
+    category = args.get('category')
+    include_inactive = args.get('include_inactive', 'false').lower() == 'true'
+
+    paginated = any(arg in args for arg in ('limit', 'cursor', 'after_id'))
+    if not paginated:
+        products = product_service.get_all_products(
+            category=category, include_inactive=include_inactive)
+        return [p.to_dict() for p in products]
+
+    sort = args.get('sort', 'id')
+    after = None
+    if args.get('cursor'):
+        after = decode_cursor(args['cursor'])
+    elif args.get('after_id'):
+        if sort != 'id':
+            raise ValueError("after_id can only be used when sorting by id")
+        after = [int(args['after_id'])]
+
+    products, next_cursor = product_service.get_product_page(
+        category=category,
+        include_inactive=include_inactive,
+        min_price=args.get('min_price', type=float),
+        max_price=args.get('max_price', type=float),
+        sort=sort,
+        after=after,
+        limit=args.get('limit', type=int))
+
+    return {
+        'products': [p.to_dict() for p in products],
+        'next_cursor': encode_cursor(next_cursor) if next_cursor else None
+    }
 
 
 @product_bp.route("/", methods=["POST"])
@@ -61,6 +157,59 @@ def create_product():
         return jsonify({'message': str(e)}), 400
 
 
+@product_bp.route("/import", methods=["POST"])
+@admin_required
+def import_products():
+    """
+    Bulk import products from a CSV or NDJSON feed.
+    The feed is either the raw request body or a multipart 'file' field.
+    Query params:
+    - format: csv or ndjson (defaults from the file name or content type)
+    - batch_size: rows per transaction
+    Rows with a sku update the existing product with that sku.
+    """
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+
+    fmt = request.args.get('format')
+    if not fmt:
+        hint = (upload.filename if upload else '') or request.content_type or ''
+        fmt = 'ndjson' if 'ndjson' in hint or 'jsonl' in hint else 'csv'
+
+    try:
+        result = import_service.import_stream(
+            stream, fmt.lower(),
+            batch_size=request.args.get('batch_size', type=int))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    return jsonify(result), 200
+
+
+@product_bp.route("/stock/bulk", methods=["POST"])
+@admin_required
+def bulk_adjust_stock():
+    """
+    Apply many stock changes in one transaction, e.g. for stocktakes and
+    deliveries. Body: {"adjustments": [{"product_id": 1, "delta": 24},
+    {"product_id": 2, "stock": 10}]}
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        stock_levels = product_service.bulk_adjust_stock(
+            data.get('adjustments'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    return jsonify({
+        'products': [{
+            'product_id': level['id'],
+            'name': level['name'],
+            'stock': level['stock']
+        } for level in stock_levels]
+    }), 200
+
+
 @product_bp.route("/<int:product_id>", methods=["PUT"])
 @admin_required
 def update_product(product_id):
@@ -1,15 +1,14 @@
 from flask import Blueprint, jsonify, g
 from middleware.auth_middleware import auth_middleware
 from middleware.admin_middleware import admin_required
-from services.receipt_service import ReceiptService
-from services.notification_service import NotificationService
+from services.container import get_service
 from repositories.order_repository import OrderRepository
+from utils.http_cache import make_etag, conditional_json
 
 receipt_bp = Blueprint("receipt", __name__, url_prefix="/api/receipts")
 
 # Initialize services
-notification_service = NotificationService()
-receipt_service = ReceiptService(notification_service)
+receipt_service = get_service('receipt_service')
 
 
 @receipt_bp.route("/<receipt_id>", methods=["GET"])
@@ -32,7 +31,7 @@ def get_receipt(receipt_id):
         if not user or user.user_type != 'admin':
             return jsonify({'error': 'Access denied'}), 403
 
-    return jsonify(receipt.to_dict()), 200
+    return conditional_json(_receipt_etag(receipt), receipt.to_dict)
 
 
 @receipt_bp.route("/order/<int:order_id>", methods=["GET"])
@@ -59,7 +58,7 @@ def get_receipt_by_order(order_id):
     if not receipt:
         return jsonify({'error': 'Receipt not found for this order'}), 404
 
-    return jsonify(receipt.to_dict()), 200
+    return conditional_json(_receipt_etag(receipt), receipt.to_dict)
 
 
 @receipt_bp.route("/<receipt_id>/resend", methods=["POST"])
@@ -91,3 +90,8 @@ def get_customer_receipts(email):
     """Get all receipts for a customer (admin only)"""
     receipts = receipt_service.get_customer_receipts(email)
     return jsonify([receipt.to_dict() for receipt in receipts]), 200
+
+
+def _receipt_etag(receipt):
+    """Receipts are immutable once issued"""
+    return make_etag('receipt', receipt.id, receipt.issued_at)
@@ -1,13 +1,13 @@
 from flask import Blueprint, jsonify, request, send_file
 from middleware.admin_middleware import admin_required
-from services.reporting_service import ReportingService
+from services.container import get_service
 from datetime import datetime
 from io import BytesIO
 
 report_bp = Blueprint("report", __name__, url_prefix="/api/reports")
 
 # Initialize service
-reporting_service = ReportingService()
+reporting_service = get_service('reporting_service')
 
 
 @report_bp.route("/sales/summary", methods=["GET"])
@@ -1,8 +1,13 @@
+from contextlib import contextmanager
+
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
 db = SQLAlchemy()
 
+# Session.info flag set while a unit of work is open
+UNIT_OF_WORK_KEY = "unit_of_work"
+
 
 def init_db(app):
     """Initialize the database with the Flask app."""
@@ -20,3 +25,41 @@ def init_db(app):
     migrate = Migrate(app, db)
 
     return db
+
+
+def in_unit_of_work():
+    return bool(db.session.info.get(UNIT_OF_WORK_KEY))
+
+
+def save_changes():
+    """
+    Commit pending changes, or only flush them when a unit of work is open
+    (the unit of work commits once at the end)
+    """
+    if in_unit_of_work():
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Run a block as a single transaction: repositories and services only
+    flush inside it, the block commits once on success and rolls back
+    everything on error. A nested block joins the outer one.
+    """
+    if in_unit_of_work():
+        yield db.session
+        return
+
+    db.session.info[UNIT_OF_WORK_KEY] = True
+    try:
+        yield db.session
+        db.session.info.pop(UNIT_OF_WORK_KEY, None)
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.info.pop(UNIT_OF_WORK_KEY, None)
@@ -0,0 +1,16 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database.db import db
+
+
+def dialect_insert(table):
+    """
+    INSERT construct for the bound database that supports
+    ON CONFLICT DO UPDATE / DO NOTHING (Postgres and SQLite)
+    """
+    name = db.engine.dialect.name
+    if name == 'postgresql':
+        return postgresql.insert(table)
+    if name == 'sqlite':
+        return sqlite.insert(table)
+    raise NotImplementedError(f"Upserts are not supported on {name}")
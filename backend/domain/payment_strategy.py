@@ -1,7 +1,12 @@
+import time
+import uuid
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from enum import Enum
 from datetime import datetime
 from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
 
 
 class PaymentStatus(Enum):
@@ -37,44 +42,64 @@ class PaymentStrategy(ABC):
     def refund(self, transaction_id: str, amount: float) -> PaymentResult:
         pass
 
+    @abstractmethod
+    def lookup(self, idempotency_key: str) -> Optional[PaymentResult]:
+        """
+        Outcome of the authorization made with idempotency_key: a PENDING
+        result while it is still processing, None if the gateway never
+        received it
+        """
+        pass
+
 
 class MockPaymentStrategy(PaymentStrategy):
-    def __init__(self):
-        self.processed_keys = set()  # Track idempotency keys
+    """
+    Local stand-in gateway; latency_seconds simulates the round trip.
+    One instance is shared by all request threads, so the record of
+    processed idempotency keys (and their outcomes, for lookup) is guarded
+    by a lock and bounded to the max_keys most recent keys.
+    """
+
+    def __init__(self, latency_seconds=1.0, max_keys=100000):
+        # idempotency key -> authorization result, None while processing
+        self.processed_keys = OrderedDict()
+        self.max_keys = max_keys
+        self.latency_seconds = latency_seconds
+        self._lock = Lock()
 
     def authorize(self, amount: float, payment_details: dict,
                   idempotency_key: str) -> PaymentResult:
-        # Idempotency check
-        if idempotency_key in self.processed_keys:
+        # Mock validation
+        card_number = payment_details.get('card_number', '')
+        if not self._validate_card(card_number):
             return PaymentResult(
                 success=False,
-                transaction_id=f"dup_{idempotency_key}",
+                transaction_id="",
                 status=PaymentStatus.DECLINED,
-                message="Duplicate transaction detected",
+                message="Invalid card details",
                 amount=amount,
                 timestamp=datetime.utcnow()
             )
 
-        # Mock validation
-        card_number = payment_details.get('card_number', '')
-        if not self._validate_card(card_number):
+        # Idempotency check; the key is recorded in the same step so a
+        # concurrent duplicate is detected while this one is processing
+        if not self._record_key(idempotency_key):
             return PaymentResult(
                 success=False,
-                transaction_id="",
+                transaction_id=f"dup_{idempotency_key}",
                 status=PaymentStatus.DECLINED,
-                message="Invalid card details",
+                message="Duplicate transaction detected",
                 amount=amount,
                 timestamp=datetime.utcnow()
             )
 
         # Simulate processing delay
-        import time
-        time.sleep(1)
+        time.sleep(self.latency_seconds)
 
-        transaction_id = f"mock_tx_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
-        self.processed_keys.add(idempotency_key)
+        transaction_id = (f"mock_tx_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+                          f"_{uuid.uuid4().hex[:8]}")
 
-        return PaymentResult(
+        result = PaymentResult(
             success=True,
             transaction_id=transaction_id,
             status=PaymentStatus.AUTHORIZED,
@@ -82,6 +107,10 @@ class MockPaymentStrategy(PaymentStrategy):
             amount=amount,
             timestamp=datetime.utcnow()
         )
+        with self._lock:
+            if idempotency_key in self.processed_keys:
+                self.processed_keys[idempotency_key] = result
+        return result
 
     def capture(self, transaction_id: str) -> PaymentResult:
         return PaymentResult(
@@ -103,6 +132,32 @@ class MockPaymentStrategy(PaymentStrategy):
             timestamp=datetime.utcnow()
         )
 
+    def lookup(self, idempotency_key: str) -> Optional[PaymentResult]:
+        with self._lock:
+            if idempotency_key not in self.processed_keys:
+                return None
+            result = self.processed_keys[idempotency_key]
+        if result is None:
+            return PaymentResult(
+                success=False,
+                transaction_id="",
+                status=PaymentStatus.PENDING,
+                message="Payment is still processing",
+                amount=0.0,
+                timestamp=datetime.utcnow()
+            )
+        return result
+
+    def _record_key(self, idempotency_key: str) -> bool:
+        """Remember a key; False if it was already processed"""
+        with self._lock:
+            if idempotency_key in self.processed_keys:
+                return False
+            self.processed_keys[idempotency_key] = None
+            while len(self.processed_keys) > self.max_keys:
+                self.processed_keys.popitem(last=False)
+            return True
+
     def _validate_card(self, card_number: str) -> bool:
         """Simple mock card validation"""
         test_cards = [
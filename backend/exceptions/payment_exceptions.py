@@ -0,0 +1,15 @@
+# Custom Exceptions for Payment Gateway Calls
+class PaymentGatewayBusyError(Exception):
+    """Raised when no payment slot frees up before the call times out"""
+
+    def __init__(self, message="Payment gateway is busy, please retry"):
+        super().__init__(message)
+
+
+class PaymentTimeoutError(Exception):
+    """Raised when the gateway does not answer within the call timeout"""
+
+    def __init__(self, timeout_seconds):
+        self.timeout_seconds = timeout_seconds
+        super().__init__(
+            f"Payment gateway did not respond within {timeout_seconds}s")
@@ -1,4 +1,10 @@
-from flask import Flask, send_from_directory
+import mimetypes
+import time
+
+import click
+from flask import Flask, abort, current_app, request, send_from_directory
+from flask.cli import with_appcontext
+from werkzeug.security import safe_join
 from config import Config
 from flask_cors import CORS
 from controllers.auth_controller import auth_bp
@@ -11,53 +17,127 @@ from controllers.sse_controller import sse_bp
 from controllers.receipt_controller import receipt_bp
 from controllers.report_controller import report_bp
 from database.db import init_db
+from services.container import ServiceContainer
+from services.registry import current_services
+from utils.image_handler import (
+    UPLOAD_FOLDER, is_content_addressed, resolve_image_file)
 
 # Import models to register with SQLAlchemy
-from models import user, product, cart, cart_item, order, order_item, payment, IdempotencyKey, invoice, receipt
-
-# --- Initialize Flask App ---
-app = Flask(__name__)
-app.config.from_object(Config)
-
-# Disable trailing slash redirects to prevent CORS preflight issues
-app.url_map.strict_slashes = False
-
-# Configure CORS to allow all origins and the Authorization header
-CORS(app, resources={
-    r"/*": {
-        "origins": "*",
-        "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization", "idempotency-key"],
-        "expose_headers": ["Content-Type", "Authorization"],
-        "supports_credentials": False
-    }
-})
-
-# --- Initialize Database ---
-db = init_db(app)
-
-# --- Register Blueprints ---
-app.register_blueprint(auth_bp)
-app.register_blueprint(product_bp)
-app.register_blueprint(cart_bp)
-app.register_blueprint(order_bp)
-app.register_blueprint(payment_bp)
-app.register_blueprint(invoice_bp)
-app.register_blueprint(sse_bp)
-app.register_blueprint(receipt_bp)
-app.register_blueprint(report_bp)
-
-
-# --- Serve Static Files ---
-@app.route('/static/product_images/<path:filename>')
+from models import user, product, cart, cart_item, order, order_item, payment, IdempotencyKey, invoice, receipt, inventory_reservation, outbox_event, number_sequence
+
+# Content-addressed images never change
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def create_app(config_object=Config):
+    """
+    Build the app and its shared services. Background jobs are not started
+    here, so importing the app (flask db, seed.py, the reloader's parent
+    process, tests) starts no threads: a process serving requests starts
+    them on its first request, or `flask run-jobs` runs them on their own.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+
+    # Disable trailing slash redirects to prevent CORS preflight issues
+    app.url_map.strict_slashes = False
+
+    # Configure CORS to allow all origins and the Authorization header
+    CORS(app, resources={
+        r"/*": {
+            "origins": "*",
+            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+            "allow_headers": ["Content-Type", "Authorization", "idempotency-key",
+                              "If-None-Match"],
+            "expose_headers": ["Content-Type", "Authorization", "ETag"],
+            "supports_credentials": False
+        }
+    })
+
+    # --- Initialize Database ---
+    init_db(app)
+
+    # --- Shared Services (used by every blueprint) ---
+    services = ServiceContainer(app.config).init_app(app)
+
+    # --- Background Jobs ---
+    if app.config['BACKGROUND_JOBS_IN_WEB'] and not app.testing:
+        app.before_request(
+            lambda: services.start_background_jobs(app.config))
+    app.cli.add_command(run_jobs_command)
+
+    # --- Register Blueprints ---
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(product_bp)
+    app.register_blueprint(cart_bp)
+    app.register_blueprint(order_bp)
+    app.register_blueprint(payment_bp)
+    app.register_blueprint(invoice_bp)
+    app.register_blueprint(sse_bp)
+    app.register_blueprint(receipt_bp)
+    app.register_blueprint(report_bp)
+
+    # --- Serve Static Files ---
+    app.add_url_rule('/static/product_images/<path:filename>',
+                     view_func=serve_product_image)
+
+    # --- Basic Test Route ---
+    app.add_url_rule('/', view_func=home)
+
+    return app
+
+
 def serve_product_image(filename):
-    return send_from_directory('static/product_images', filename)
+    resolved = resolve_image_file(filename)
+    # Content-addressed files never change; a variant still being generated
+    # falls back to the original and must not be cached under its URL
+    immutable = resolved == filename and is_content_addressed(filename)
+    etag = filename if immutable else True
+
+    if current_app.config['IMAGE_OFFLOAD'] == 'x-accel-redirect':
+        if safe_join(UPLOAD_FOLDER, resolved) is None:
+            abort(404)
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(resolved)[0])
+        response.headers['X-Accel-Redirect'] = (
+            current_app.config['IMAGE_ACCEL_PREFIX'] + resolved)
+        if immutable:
+            response.set_etag(etag)
+        response = response.make_conditional(request)
+    else:
+        # With USE_X_SENDFILE this only sets the X-Sendfile header
+        response = send_from_directory(
+            'static/product_images', resolved, etag=etag,
+            max_age=IMMUTABLE_MAX_AGE if immutable else None)
+
+    if immutable:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+
+@click.command('run-jobs')
+@with_appcontext
+def run_jobs_command():
+    """Run the enabled background jobs in the foreground until interrupted"""
+    services = current_services()
+    services.start_background_jobs(current_app.config)
+    click.echo("Background jobs running, press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        services.stop_background_jobs()
+
 
-# --- Basic Test Route ---
-@app.route('/')
 def home():
     return {"message": "Online Convenience Store API running"}
 
 
+app = create_app()
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,38 @@
+"""add full-text search index on products
+
+Revision ID: 5d1f3a9c7e42
+Revises: 0c09eeab059d
+Create Date: 2026-10-17 10:03:17.402915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1f3a9c7e42'
+down_revision = '0c09eeab059d'
+branch_labels = None
+depends_on = None
+
+# Must match SEARCH_DOCUMENT_SQL in repositories/product_repository.py
+SEARCH_DOCUMENT_SQL = (
+    "to_tsvector('simple', coalesce(products.name, '') || ' ' || "
+    "coalesce(products.description, ''))"
+)
+
+
+def upgrade():
+    # GIN full-text index is Postgres only; other databases use the
+    # in-memory search index instead
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(
+        f"CREATE INDEX ix_products_search ON products "
+        f"USING gin (({SEARCH_DOCUMENT_SQL}))")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("DROP INDEX IF EXISTS ix_products_search")
@@ -8,3 +8,6 @@ from .order_item import OrderItem
 from .payment import Payment
 from .idempotency_key import IdempotencyKey
 from .invoice import Invoice
+from .inventory_reservation import InventoryReservation
+from .outbox_event import OutboxEvent
+from .number_sequence import NumberSequence
@@ -3,9 +3,17 @@ from database.db import db
 
 class Cart(db.Model):
     __tablename__ = "carts"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", name="uq_carts_user_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # Denormalized totals, maintained by CartRepository on every change
+    item_count = db.Column(db.Integer, nullable=False, default=0,
+                           server_default="0")
+    subtotal = db.Column(db.Float, nullable=False, default=0.0,
+                         server_default="0")
 
     user = db.relationship("User", backref="carts")
     items = db.relationship(
@@ -13,12 +21,13 @@ class Cart(db.Model):
     )
 
     def get_total(self):
-        return sum(item.product.price * item.quantity for item in self.items)
+        return round(self.subtotal or 0.0, 2)
 
     def to_dict(self):
         return {
             "id": self.id,
             "user_id": self.user_id,
             "items": [item.to_dict() for item in self.items],
+            "item_count": self.item_count or 0,
             "total": self.get_total(),
         }
@@ -3,6 +3,10 @@ from database.db import db
 
 class CartItem(db.Model):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "cart_id", "product_id", name="uq_cart_items_cart_product"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     cart_id = db.Column(db.Integer, db.ForeignKey("carts.id"), nullable=False)
@@ -15,8 +15,11 @@ class IdempotencyKey(db.Model):
     # JSON response to return for duplicates
     response_data = db.Column(db.Text, nullable=True)
     status_code = db.Column(db.Integer, nullable=True)  # HTTP status code
+    # in_progress while the first request runs, then completed
+    status = db.Column(db.String(20), nullable=False, default='completed',
+                       server_default='completed')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    expires_at = db.Column(db.DateTime, nullable=True)  # Optional expiration
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)  # Purged after this
 
     # Relationships
     user = db.relationship("User", backref="idempotency_keys")
@@ -29,6 +32,7 @@ class IdempotencyKey(db.Model):
             'endpoint': self.endpoint,
             'response_data': self.response_data,
             'status_code': self.status_code,
+            'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'expires_at': self.expires_at.isoformat() if self.expires_at else None
         }
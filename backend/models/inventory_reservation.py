@@ -0,0 +1,52 @@
+from datetime import datetime
+from database.db import db
+from domain.inventory_reservation import ReservationStatus
+
+
+class InventoryReservation(db.Model):
+    """
+    Stock held for a checkout. The product's stock is decremented when the
+    hold is taken; an expired hold is released by the reservation sweeper.
+    """
+    __tablename__ = "inventory_reservations"
+    __table_args__ = (
+        db.Index("ix_inventory_reservations_status_expires_at",
+                 "status", "expires_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(
+        db.Integer,
+        db.ForeignKey("products.id"),
+        nullable=False,
+        index=True)
+    order_id = db.Column(
+        db.Integer,
+        db.ForeignKey("orders.id"),
+        nullable=True,
+        index=True)
+    quantity = db.Column(db.Integer, nullable=False)
+    status = db.Column(
+        db.String(20),
+        nullable=False,
+        default=ReservationStatus.RESERVED.value)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def is_expired(self) -> bool:
+        return datetime.utcnow() > self.expires_at
+
+    def can_commit(self) -> bool:
+        return (self.status == ReservationStatus.RESERVED.value
+                and not self.is_expired())
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "product_id": self.product_id,
+            "order_id": self.order_id,
+            "quantity": self.quantity,
+            "status": self.status,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
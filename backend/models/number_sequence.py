@@ -0,0 +1,16 @@
+from datetime import datetime
+from database.db import db
+
+
+class NumberSequence(db.Model):
+    """
+    Next unallocated value of a named counter, e.g. 'INV-20261017'.
+    Processes reserve blocks of values from it and hand them out from
+    memory (hi-lo), so the row is touched once per block.
+    """
+    __tablename__ = "number_sequences"
+
+    name = db.Column(db.String(50), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False, default=1)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,50 @@
+import json
+from datetime import datetime
+from database.db import db
+
+
+class OutboxEvent(db.Model):
+    """
+    A side effect (email, notification, SSE message) recorded in the same
+    transaction as the change that caused it and delivered afterwards by
+    the outbox workers.
+    """
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        db.Index("ix_outbox_events_status_available_at",
+                 "status", "available_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    # pending, processing, delivered, failed
+    status = db.Column(db.String(20), nullable=False, default="pending")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # Earliest time of the next delivery attempt
+    available_at = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow)
+    # A worker's claim on a processing event lapses at this time
+    locked_until = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    delivered_at = db.Column(db.DateTime, nullable=True)
+
+    def __init__(self, event_type, payload):
+        self.event_type = event_type
+        self.payload = json.dumps(payload)
+
+    def get_payload(self):
+        return json.loads(self.payload)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "event_type": self.event_type,
+            "payload": self.get_payload(),
+            "status": self.status,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "delivered_at": self.delivered_at.isoformat() if self.delivered_at else None,
+        }
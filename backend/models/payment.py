@@ -5,6 +5,10 @@ import uuid
 
 class Payment(db.Model):
     __tablename__ = 'payments'
+    __table_args__ = (
+        # Pending payments awaiting reconciliation, oldest first
+        db.Index('ix_payments_status_created_at', 'status', 'created_at'),
+    )
 
     id = db.Column(
         db.String(36),
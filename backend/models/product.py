@@ -1,19 +1,32 @@
+from sqlalchemy import inspect
+
 from database.db import db
+from services.registry import current_services
+from utils.image_handler import image_url, variant_urls
 
 
 class Product(db.Model):
     __tablename__ = "products"
+    __table_args__ = (
+        db.Index("ix_products_active_category", "is_active", "category"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
+    sku = db.Column(db.String(64), unique=True, index=True, nullable=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(255), nullable=True)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False, index=True)
     stock = db.Column(db.Integer, nullable=False)
     category = db.Column(db.String(50), nullable=False, default='general')
     image_path = db.Column(db.String(255), nullable=True)
     low_stock_threshold = db.Column(db.Integer, nullable=False, default=5)
     is_active = db.Column(db.Boolean, nullable=False, default=True)
     is_active = db.Column(db.Boolean, nullable=False, default=True)
+    # Row version, bumped by every UPDATE (ORM or Core); keys the cached
+    # serialized fragment
+    version = db.Column(db.Integer, nullable=False, default=1,
+                        server_default='1',
+                        onupdate=db.text('version + 1'))
 
     def __init__(self, name, description, price, stock, image_path=None):
         self.name = name
@@ -23,22 +36,27 @@ class Product(db.Model):
         self.image_path = image_path
 
     def to_dict(self):
-        # Check if image_path is already a full URL or a local file
-        image_url = None
-        if self.image_path:
-            if self.image_path.startswith(('http://', 'https://')):
-                image_url = self.image_path
-            else:
-                image_url = f'/static/product_images/{self.image_path}'
+        """
+        Serialized product, shared through the fragment cache while the row
+        version is unchanged. Treat the returned dict as read-only.
+        """
+        if self.id is None or inspect(self).modified:
+            # Unsaved changes are not reflected in the version yet
+            return self._build_dict()
+        return current_services().product_fragment_cache.get_or_build(
+            self.id, self.version, self._build_dict)
 
+    def _build_dict(self):
         return {
             'id': self.id,
+            'sku': self.sku,
             'name': self.name,
             'description': self.description,
             'price': self.price,
             'stock': self.stock,
             'category': self.category,
-            'image_path': image_url,
+            'image_path': image_url(self.image_path),
+            'image_variants': variant_urls(self.image_path),
             'is_active': self.is_active
         }
 
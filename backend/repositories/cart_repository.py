@@ -1,43 +1,167 @@
-from database.db import db
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import selectinload
+
+from database.db import db, save_changes
+from database.dialect import dialect_insert
 from models.cart import Cart
 from models.cart_item import CartItem
+from models.product import Product
 
 
 class CartRepository:
     def get_or_create_cart(self, user_id):
         cart = Cart.query.filter_by(user_id=user_id).first()
         if not cart:
-            cart = Cart(user_id=user_id)
-            db.session.add(cart)
-            db.session.commit()
+            # Race-free: a concurrent request creating the same cart makes
+            # this a no-op thanks to the unique user_id constraint
+            stmt = dialect_insert(Cart.__table__).values(
+                user_id=user_id
+            ).on_conflict_do_nothing(index_elements=['user_id'])
+            db.session.execute(stmt)
+            save_changes()
+            cart = Cart.query.filter_by(user_id=user_id).one()
         return cart
 
     def add_item(self, cart, product, quantity):
-        existing_item = next(
-            (i for i in cart.items if i.product_id == product.id), None)
-        if existing_item:
-            existing_item.quantity += quantity
-        else:
-            db.session.add(
-                CartItem(
-                    cart=cart,
-                    product=product,
-                    quantity=quantity))
-        db.session.commit()
+        """
+        Add quantity of a product with a single
+        INSERT ... ON CONFLICT (cart_id, product_id) DO UPDATE statement
+        """
+        table = CartItem.__table__
+        stmt = dialect_insert(table).values(
+            cart_id=cart.id, product_id=product.id, quantity=quantity)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['cart_id', 'product_id'],
+            set_={'quantity': table.c.quantity + stmt.excluded.quantity})
+        db.session.execute(stmt)
+        self._refresh_totals(cart)
+        save_changes()
+        return cart
+
+    def get_item_quantities(self, cart_id):
+        """
+        Current lines of a cart as {product_id: (item_id, quantity)},
+        locked until the transaction ends
+        """
+        rows = db.session.query(
+            CartItem.product_id, CartItem.id, CartItem.quantity
+        ).filter(CartItem.cart_id == cart_id).with_for_update().all()
+        return {product_id: (item_id, quantity)
+                for product_id, item_id, quantity in rows}
+
+    def apply_item_changes(self, cart, quantities, removed_product_ids):
+        """
+        Set line quantities ({product_id: quantity}) with one upsert and
+        drop removed lines with one DELETE, recompute the cart totals, then
+        commit once
+        """
+        table = CartItem.__table__
+        if quantities:
+            stmt = dialect_insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['cart_id', 'product_id'],
+                set_={'quantity': stmt.excluded.quantity})
+            db.session.execute(stmt, [
+                {'cart_id': cart.id, 'product_id': product_id,
+                 'quantity': quantity}
+                for product_id, quantity in sorted(quantities.items())])
+        if removed_product_ids:
+            db.session.execute(table.delete().where(
+                table.c.cart_id == cart.id,
+                table.c.product_id.in_(sorted(removed_product_ids))))
+        self._refresh_totals(cart)
+        save_changes()
         return cart
 
     def remove_item(self, cart, item_id):
-        item = CartItem.query.filter_by(id=item_id, cart_id=cart.id).first()
-        if item:
-            db.session.delete(item)
-            db.session.commit()
+        result = db.session.execute(
+            delete(CartItem).where(
+                CartItem.id == item_id, CartItem.cart_id == cart.id),
+            execution_options={'synchronize_session': 'evaluate'})
+        if result.rowcount:
+            self._refresh_totals(cart)
+            save_changes()
+
+    def get_summary(self, user_id):
+        """Item count and subtotal straight from the carts row"""
+        return db.session.query(
+            Cart.id, Cart.item_count, Cart.subtotal
+        ).filter(Cart.user_id == user_id).first()
 
     def get_cart(self, user_id):
         return Cart.query.filter_by(user_id=user_id).first()
 
+    def get_cart_with_items(self, user_id):
+        """
+        Load the cart with its items and their products up front
+        (two queries however many lines the cart has)
+        """
+        return Cart.query.options(
+            selectinload(Cart.items).joinedload(CartItem.product)
+        ).filter_by(user_id=user_id).populate_existing().first()
+
+    def delete_items(self, cart):
+        """
+        Remove every line of a cart with a single DELETE. Does not commit.
+        Matching CartItem objects already in the session are marked deleted
+        and the cart's items collection is expired, so the session stays
+        consistent without loading the lines.
+        """
+        db.session.execute(
+            delete(CartItem).where(CartItem.cart_id == cart.id),
+            execution_options={'synchronize_session': 'evaluate'})
+        db.session.execute(
+            update(Cart).where(Cart.id == cart.id).values(
+                item_count=0, subtotal=0.0),
+            execution_options={'synchronize_session': False})
+        if cart in db.session:
+            db.session.expire(cart, ['items', 'item_count', 'subtotal'])
+
     def clear_cart(self, user_id):
         cart = self.get_cart(user_id)
         if cart:
-            for item in cart.items:
-                db.session.delete(item)
-            db.session.commit()
+            self.delete_items(cart)
+            save_changes()
+
+    def reprice_carts(self, product_ids):
+        """
+        Recompute the subtotal of every cart holding one of the products
+        (after price changes) with a single set-based UPDATE. product_ids
+        may be a list or a SELECT of product ids. Does not commit.
+        """
+        affected = select(CartItem.cart_id).where(
+            CartItem.product_id.in_(product_ids))
+
+        db.session.execute(
+            update(Cart).where(Cart.id.in_(affected)).values(
+                subtotal=self._line_totals()[1]),
+            execution_options={'synchronize_session': False})
+
+    def _line_totals(self):
+        """(item count, subtotal) of the carts row's lines, at current prices"""
+        item_count = select(
+            func.coalesce(func.sum(CartItem.quantity), 0)
+        ).where(CartItem.cart_id == Cart.id).scalar_subquery()
+        subtotal = select(
+            func.coalesce(func.sum(CartItem.quantity * Product.price), 0.0)
+        ).join(
+            Product, Product.id == CartItem.product_id
+        ).where(CartItem.cart_id == Cart.id).scalar_subquery()
+        return item_count, subtotal
+
+    def _refresh_totals(self, cart):
+        """
+        Recompute the cart's totals from its lines, as reprice_carts does,
+        so they cannot drift from the lines or from price changes. The row
+        lock is taken first so the recompute sees lines committed by a
+        concurrent change to the same cart.
+        """
+        db.session.query(Cart.id).filter(
+            Cart.id == cart.id).with_for_update().first()
+        item_count, subtotal = self._line_totals()
+        db.session.execute(
+            update(Cart).where(Cart.id == cart.id).values(
+                item_count=item_count, subtotal=subtotal),
+            execution_options={'synchronize_session': False})
+        if cart in db.session:
+            db.session.expire(cart, ['item_count', 'subtotal'])
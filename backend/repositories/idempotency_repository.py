@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import delete
+
+from database.db import db
+from models.idempotency_key import IdempotencyKey
+
+
+class IdempotencyKeyRepository:
+    def delete_expired(self, now: datetime,
+                       limit: int) -> List[Tuple[str, int, str]]:
+        """
+        Delete up to `limit` keys whose expires_at has passed (oldest first,
+        served by the expires_at index) and return their (key, user_id,
+        endpoint). Does not commit.
+        """
+        expired = db.session.query(IdempotencyKey.id).filter(
+            IdempotencyKey.expires_at <= now
+        ).order_by(IdempotencyKey.expires_at).limit(limit).with_for_update(
+            skip_locked=True).all()
+        if not expired:
+            return []
+
+        table = IdempotencyKey.__table__
+        rows = db.session.execute(
+            delete(table)
+            .where(table.c.id.in_([row.id for row in expired]))
+            .returning(table.c.key, table.c.user_id, table.c.endpoint)).all()
+        return [tuple(row) for row in rows]
@@ -1,11 +1,11 @@
 from models.invoice import Invoice
-from database.db import db
+from database.db import db, save_changes
 
 
 class InvoiceRepository:
     def save(self, invoice: Invoice) -> Invoice:
         db.session.add(invoice)
-        db.session.commit()
+        save_changes()
         return invoice
 
     def get_by_id(self, invoice_id: str) -> Invoice:
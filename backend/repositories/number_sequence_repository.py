@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from database.db import db
+from database.dialect import dialect_insert
+from models.number_sequence import NumberSequence
+
+
+class NumberSequenceRepository:
+    def reserve_block(self, name: str, size: int) -> int:
+        """
+        Reserve `size` consecutive values of the named sequence, creating
+        it at 1 if needed, and return the first one.
+
+        Runs in its own transaction on a separate connection and commits
+        at once: a block must never be rolled back with the caller's work,
+        or another process could be handed the same values.
+        """
+        table = NumberSequence.__table__
+        stmt = dialect_insert(table).values(
+            name=name, next_value=1 + size, updated_at=datetime.utcnow())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['name'],
+            set_={
+                'next_value': table.c.next_value + size,
+                'updated_at': stmt.excluded.updated_at,
+            }).returning(table.c.next_value)
+
+        with db.engine.begin() as connection:
+            next_value = connection.execute(stmt).scalar_one()
+        return next_value - size
@@ -1,6 +1,11 @@
-from typing import List, Optional
-from database.db import db
+from typing import Dict, List, Optional
+
+from sqlalchemy import inspect, insert
+
+from database.db import db, save_changes
 from models.order import Order
+from models.order_item import OrderItem
+from models.product import Product
 from domain.order_lifecycle import OrderStatus
 
 
@@ -10,7 +15,59 @@ class OrderRepository:
     def save(self, order: Order) -> None:
         """Save or update an order"""
         db.session.add(order)
-        db.session.commit()
+        save_changes()
+
+    def create_with_items(self, order: Order, lines: List[Dict]) -> Order:
+        """
+        Save a new order and insert all its lines with one bulk INSERT
+        (batched by SQLAlchemy's insertmanyvalues) instead of flushing one
+        OrderItem object per line. `lines` are dicts as built by
+        order_lines_from_cart. order.items loads from the database on
+        next access.
+        """
+        db.session.add(order)
+        db.session.flush()  # Get order ID without committing
+        if lines:
+            db.session.execute(
+                insert(OrderItem),
+                [dict(line, order_id=order.id) for line in lines])
+        db.session.expire(order, ['items'])
+        save_changes()
+        return order
+
+    def order_lines_from_cart(self, cart_items) -> List[Dict]:
+        """
+        Order line rows with product name and price snapshots for cart
+        items. Products already loaded on the items are used as they are;
+        the rest are fetched with one query rather than one lazy load per
+        line. Raises ValueError if a product no longer exists.
+        """
+        products = {}
+        missing = set()
+        for item in cart_items:
+            if 'product' in inspect(item).unloaded:
+                missing.add(item.product_id)
+            elif item.product is not None:
+                products[item.product_id] = item.product
+        missing -= products.keys()
+        if missing:
+            products.update({
+                product.id: product for product in
+                Product.query.filter(Product.id.in_(missing)).all()})
+
+        lines = []
+        for item in cart_items:
+            product = products.get(item.product_id)
+            if product is None:
+                raise ValueError(
+                    f"Product {item.product_id} is no longer available")
+            lines.append({
+                'product_id': item.product_id,
+                'product_name': product.name,
+                'quantity': item.quantity,
+                'unit_price': product.price,  # Price snapshot
+            })
+        return lines
 
     def find_by_id(self, order_id: int) -> Optional[Order]:
         """Find an order by its ID"""
@@ -34,7 +91,7 @@ class OrderRepository:
 
         order.status = status.value
         order.updated_at = db.func.now()
-        db.session.commit()
+        save_changes()
         return True
 
     def find_recent_orders(self, limit: int = 10) -> List[Order]:
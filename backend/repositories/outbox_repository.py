@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import and_, delete, or_, update
+
+from database.db import db
+from models.outbox_event import OutboxEvent
+
+
+class OutboxRepository:
+    def add(self, event_type: str, payload: dict) -> OutboxEvent:
+        """Record an event in the current transaction. Does not commit."""
+        event = OutboxEvent(event_type, payload)
+        db.session.add(event)
+        return event
+
+    def claim_batch(self, limit: int, lease_seconds: int) -> List[OutboxEvent]:
+        """
+        Lease up to `limit` due events (pending ones, and processing ones
+        whose worker's lease ran out) and commit the claim. The conditional
+        UPDATE makes each event go to exactly one worker.
+        """
+        now = datetime.utcnow()
+        due = or_(
+            and_(OutboxEvent.status == 'pending',
+                 OutboxEvent.available_at <= now),
+            and_(OutboxEvent.status == 'processing',
+                 OutboxEvent.locked_until < now))
+
+        candidates = db.session.query(OutboxEvent.id).filter(due).order_by(
+            OutboxEvent.available_at
+        ).limit(limit).with_for_update(skip_locked=True).all()
+        if not candidates:
+            db.session.rollback()
+            return []
+
+        claimed = db.session.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_([row.id for row in candidates]), due)
+            .values(status='processing',
+                    locked_until=now + timedelta(seconds=lease_seconds),
+                    attempts=OutboxEvent.attempts + 1)
+            .returning(OutboxEvent.id),
+            execution_options={'synchronize_session': False}).scalars().all()
+        db.session.commit()
+        if not claimed:
+            return []
+        return OutboxEvent.query.filter(
+            OutboxEvent.id.in_(claimed)).order_by(OutboxEvent.id).all()
+
+    def mark_delivered(self, event: OutboxEvent) -> None:
+        event.status = 'delivered'
+        event.delivered_at = datetime.utcnow()
+        event.locked_until = None
+        event.last_error = None
+        db.session.commit()
+
+    def mark_failed(self, event: OutboxEvent, error: str,
+                    retry_at: datetime = None) -> None:
+        """Schedule a retry at retry_at, or give up when it is None"""
+        event.last_error = error
+        event.locked_until = None
+        if retry_at is None:
+            event.status = 'failed'
+        else:
+            event.status = 'pending'
+            event.available_at = retry_at
+        db.session.commit()
+
+    def delete_delivered(self, before: datetime, limit: int) -> int:
+        """
+        Delete up to `limit` events delivered before `before` and return how
+        many were deleted. Does not commit.
+        """
+        expired = db.session.query(OutboxEvent.id).filter(
+            OutboxEvent.status == 'delivered',
+            OutboxEvent.delivered_at < before
+        ).limit(limit).with_for_update(skip_locked=True).all()
+        if not expired:
+            return 0
+        result = db.session.execute(
+            delete(OutboxEvent.__table__).where(
+                OutboxEvent.__table__.c.id.in_([row.id for row in expired])))
+        return result.rowcount
+
+    def count_by_status(self) -> dict:
+        rows = db.session.query(
+            OutboxEvent.status, db.func.count(OutboxEvent.id)
+        ).group_by(OutboxEvent.status).all()
+        return dict(rows)
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import List
+
+from models.payment import Payment
+
+
+class PaymentRepository:
+    def find_pending_ids(self, created_before: datetime,
+                         limit: int) -> List[str]:
+        """
+        Ids of payments still pending that were created before
+        `created_before` (oldest first, served by the status index)
+        """
+        rows = Payment.query.with_entities(Payment.id).filter(
+            Payment.status == 'pending',
+            Payment.created_at < created_before
+        ).order_by(Payment.created_at).limit(limit).all()
+        return [row.id for row in rows]
@@ -1,27 +1,315 @@
-from database.db import db
+import re
+
+from sqlalchemy import and_, bindparam, func, literal_column, or_, update
+
+from database.db import db, save_changes
+from database.dialect import dialect_insert
 from models.product import Product
 
 
+# Must match the expression of the ix_products_search GIN index (Postgres)
+SEARCH_DOCUMENT_SQL = (
+    "to_tsvector('simple', coalesce(products.name, '') || ' ' || "
+    "coalesce(products.description, ''))"
+)
+
+
 class ProductRepository:
+    # sort key -> (column, descending)
+    SORT_OPTIONS = {
+        'id': (Product.id, False),
+        'name': (Product.name, False),
+        'price': (Product.price, False),
+        '-price': (Product.price, True),
+    }
+
     def get_all(self):
         return Product.query.all()
 
     def get_by_id(self, product_id):
         return Product.query.get(product_id)
 
+    def find(self, category=None, is_active=True, min_price=None,
+             max_price=None, sort='id', after=None, limit=None):
+        """
+        Filter, sort and keyset-paginate products in SQL.
+
+        `after` is the keyset of the last row of the previous page: [id] when
+        sorting by id, otherwise [sort_value, id]. Pass is_active=None to
+        include inactive products.
+        """
+        if sort not in self.SORT_OPTIONS:
+            raise ValueError(f"Invalid sort: {sort}")
+        column, descending = self.SORT_OPTIONS[sort]
+
+        query = Product.query
+        if is_active is not None:
+            query = query.filter(Product.is_active == is_active)
+        if category:
+            query = query.filter(Product.category == category)
+        if min_price is not None:
+            query = query.filter(Product.price >= min_price)
+        if max_price is not None:
+            query = query.filter(Product.price <= max_price)
+
+        if after:
+            query = query.filter(self._after_clause(column, descending, after))
+
+        if column is Product.id:
+            query = query.order_by(Product.id.desc() if descending else Product.id)
+        elif descending:
+            query = query.order_by(column.desc(), Product.id.desc())
+        else:
+            query = query.order_by(column, Product.id)
+
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def count_image_references(self, image_path, exclude_product_id=None):
+        """Number of products using an image file, optionally excluding one"""
+        query = Product.query.filter(Product.image_path == image_path)
+        if exclude_product_id is not None:
+            query = query.filter(Product.id != exclude_product_id)
+        return query.count()
+
+    def get_category_stats(self):
+        """
+        Active product count and price range per category, aggregated in SQL
+        (served by the (is_active, category) index)
+        """
+        rows = db.session.query(
+            Product.category,
+            func.count(Product.id),
+            func.min(Product.price),
+            func.max(Product.price)
+        ).filter(
+            Product.is_active == True  # noqa: E712
+        ).group_by(Product.category).order_by(Product.category).all()
+
+        return [{
+            'category': category,
+            'product_count': count,
+            'min_price': min_price,
+            'max_price': max_price
+        } for category, count, min_price, max_price in rows]
+
+    def get_by_ids(self, product_ids, active_only=False):
+        """Load several products in one query, keeping the given order"""
+        if not product_ids:
+            return []
+        query = Product.query.filter(Product.id.in_(product_ids))
+        if active_only:
+            query = query.filter(Product.is_active.is_(True))
+        products = query.all()
+        by_id = {product.id: product for product in products}
+        return [by_id[pid] for pid in product_ids if pid in by_id]
+
+    def search_fulltext(self, query, limit=20, offset=0):
+        """
+        Ranked full-text search over name and description (Postgres only).
+        Every term must match; the last one also matches as a prefix.
+        Returns (products, total_matches).
+        """
+        terms = re.findall(r'\w+', query.lower())
+        if not terms:
+            return [], 0
+        ts_query = ' & '.join(terms[:-1] + [terms[-1] + ':*'])
+
+        document = literal_column(SEARCH_DOCUMENT_SQL)
+        tsquery = func.to_tsquery('simple', ts_query)
+        matches = Product.query.filter(
+            Product.is_active.is_(True),
+            document.op('@@')(tsquery))
+
+        total = matches.count()
+        products = matches.order_by(
+            func.ts_rank(document, tsquery).desc(), Product.id
+        ).offset(offset).limit(limit).all()
+        return products, total
+
+    def cursor_values(self, product, sort='id'):
+        """Keyset values identifying `product` as the last row of a page"""
+        column, _ = self.SORT_OPTIONS[sort]
+        if column is Product.id:
+            return [product.id]
+        return [getattr(product, column.key), product.id]
+
+    def _after_clause(self, column, descending, after):
+        self._check_cursor(column, after)
+        if column is Product.id:
+            last_id = after[0]
+            return Product.id < last_id if descending else Product.id > last_id
+
+        last_value, last_id = after
+        if descending:
+            return or_(column < last_value,
+                       and_(column == last_value, Product.id < last_id))
+        return or_(column > last_value,
+                   and_(column == last_value, Product.id > last_id))
+
+    def _check_cursor(self, column, after):
+        """Raise ValueError unless `after` is a well-formed keyset for column"""
+        def is_int(value):
+            return isinstance(value, int) and not isinstance(value, bool)
+
+        if not isinstance(after, (list, tuple)):
+            raise ValueError("Invalid cursor")
+        if column is Product.id:
+            valid = len(after) == 1 and is_int(after[0])
+        elif len(after) != 2 or not is_int(after[1]):
+            valid = False
+        elif column is Product.name:
+            valid = isinstance(after[0], str)
+        else:
+            valid = is_int(after[0]) or isinstance(after[0], float)
+        if not valid:
+            raise ValueError("Invalid cursor")
+
     def create(self, product):
         db.session.add(product)
-        db.session.commit()
+        save_changes()
         return product
 
     def update(self, product):
-        db.session.commit()
+        save_changes()
         return product
 
+    def upsert_many(self, rows):
+        """
+        Insert or update many products in one statement per kind of row.
+        Rows with a sku are upserted on it; rows without one are inserted.
+        Every row must carry the same keys. Does not commit.
+        """
+        with_sku = [row for row in rows if row.get('sku')]
+        without_sku = [row for row in rows if not row.get('sku')]
+
+        if with_sku:
+            stmt = dialect_insert(Product.__table__)
+            excluded = stmt.excluded
+            table = Product.__table__.c
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['sku'],
+                set_={
+                    'name': excluded.name,
+                    'price': excluded.price,
+                    'stock': excluded.stock,
+                    'category': excluded.category,
+                    'description': func.coalesce(
+                        excluded.description, table.description),
+                    'image_path': func.coalesce(
+                        excluded.image_path, table.image_path),
+                    'is_active': excluded.is_active,
+                    'version': table.version + 1,
+                })
+            db.session.execute(stmt, with_sku)
+
+        if without_sku:
+            db.session.execute(Product.__table__.insert(), without_sku)
+
+        return len(rows)
+
+    def apply_stock_changes(self, deltas, absolutes):
+        """
+        Apply stock deltas ({product_id: delta}) and absolute stock levels
+        ({product_id: stock}) with set-based UPDATEs in one transaction.
+        Raises ValueError (nothing applied) if a product is missing or would
+        end up with negative stock. Returns the resulting stock levels as
+        dicts with id, name, stock and low_stock_threshold.
+        """
+        product_ids = sorted(set(deltas) | set(absolutes))
+        current = dict(db.session.query(Product.id, Product.stock).filter(
+            Product.id.in_(product_ids)).with_for_update().all())
+
+        missing = [pid for pid in product_ids if pid not in current]
+        if missing:
+            db.session.rollback()
+            raise ValueError(f"Products not found: {missing}")
+        negative = [pid for pid, delta in deltas.items()
+                    if current[pid] + delta < 0]
+        negative += [pid for pid, stock in absolutes.items() if stock < 0]
+        if negative:
+            db.session.rollback()
+            raise ValueError(
+                f"Stock cannot go negative for products: {sorted(negative)}")
+
+        table = Product.__table__
+        if deltas:
+            db.session.execute(
+                update(table)
+                .where(table.c.id == bindparam('b_id'))
+                .values(stock=table.c.stock + bindparam('b_delta')),
+                [{'b_id': pid, 'b_delta': delta}
+                 for pid, delta in sorted(deltas.items())])
+        if absolutes:
+            db.session.execute(
+                update(table)
+                .where(table.c.id == bindparam('b_id'))
+                .values(stock=bindparam('b_stock')),
+                [{'b_id': pid, 'b_stock': stock}
+                 for pid, stock in sorted(absolutes.items())])
+
+        rows = db.session.query(
+            Product.id, Product.name, Product.stock, Product.low_stock_threshold
+        ).filter(Product.id.in_(product_ids)).order_by(Product.id).all()
+        db.session.commit()
+        return [row._asdict() for row in rows]
+
+    def reserve_stock(self, quantities):
+        """
+        Take stock for {product_id: quantity} with one executemany of a
+        conditional UPDATE (stock = stock - q WHERE stock >= q), so
+        concurrent buyers can never oversell. Rows are touched in product id
+        order so concurrent reservations lock in the same order and cannot
+        deadlock.
+
+        All or nothing: the UPDATE runs in a savepoint that is rolled back
+        when fewer rows matched than were asked for. Returns None on success,
+        or the (id, name) of a product that was short. Does not commit.
+        """
+        table = Product.__table__
+        take = update(table).where(
+            table.c.id == bindparam('b_id'),
+            table.c.stock >= bindparam('b_quantity')
+        ).values(stock=table.c.stock - bindparam('b_quantity'))
+        params = [{'b_id': pid, 'b_quantity': quantities[pid]}
+                  for pid in sorted(quantities)]
+
+        savepoint = db.session.begin_nested()
+        taken = db.session.execute(take, params).rowcount
+        if taken == len(params):
+            savepoint.commit()
+            return None
+        savepoint.rollback()
+
+        # Name a short product; missing products count as short
+        rows = {row.id: row for row in db.session.query(
+            Product.id, Product.name, Product.stock
+        ).filter(Product.id.in_(quantities))}
+        for product_id in sorted(quantities):
+            row = rows.get(product_id)
+            if row is None or row.stock < quantities[product_id]:
+                return product_id, row.name if row else None
+        # Restocked since the UPDATE; report the first product
+        product_id = min(quantities)
+        return product_id, rows[product_id].name
+
+    def restore_stock(self, quantities):
+        """Add quantities back to stock ({product_id: quantity}). Does not commit."""
+        if not quantities:
+            return
+        table = Product.__table__
+        db.session.execute(
+            update(table)
+            .where(table.c.id == bindparam('b_id'))
+            .values(stock=table.c.stock + bindparam('b_quantity')),
+            [{'b_id': pid, 'b_quantity': quantity}
+             for pid, quantity in sorted(quantities.items())])
+
     def delete(self, product_id):
         product = self.get_by_id(product_id)
         if product:
             db.session.delete(product)
-            db.session.commit()
+            save_changes()
             return True
         return False
@@ -0,0 +1,127 @@
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import func, insert, select, update
+
+from database.db import db
+from domain.inventory_reservation import ReservationStatus
+from models.inventory_reservation import InventoryReservation
+from models.order import Order
+from models.product import Product
+
+RESERVED = ReservationStatus.RESERVED.value
+INSERT_COLUMNS = ('product_id', 'order_id', 'quantity', 'status',
+                  'expires_at', 'created_at')
+
+
+class ReservationRepository:
+    def add_many(self, reservations: List[InventoryReservation]) -> None:
+        """
+        Insert reservations, at most one per product, with one
+        INSERT ... RETURNING and set the ids on the given objects, which stay
+        out of the session (load them with get_by_ids to change them). Does
+        not commit.
+        """
+        if not reservations:
+            return
+        # Rows are matched back by product, so RETURNING order is irrelevant
+        # (asking the driver to keep it costs one INSERT per row on SQLite)
+        rows = db.session.execute(
+            insert(InventoryReservation).returning(
+                InventoryReservation.id, InventoryReservation.product_id),
+            [{column: getattr(reservation, column)
+              for column in INSERT_COLUMNS}
+             for reservation in reservations]).all()
+        ids = {row.product_id: row.id for row in rows}
+        for reservation in reservations:
+            reservation.id = ids[reservation.product_id]
+
+    def get_by_ids(self, reservation_ids: List[int]) -> List[InventoryReservation]:
+        return InventoryReservation.query.filter(
+            InventoryReservation.id.in_(reservation_ids)
+        ).order_by(InventoryReservation.id).all()
+
+    def get_reserved_ids(self, order_id: int) -> List[int]:
+        """Ids of the order's holds still in the reserved state"""
+        rows = db.session.query(InventoryReservation.id).filter(
+            InventoryReservation.order_id == order_id,
+            InventoryReservation.status == RESERVED
+        ).order_by(InventoryReservation.id).all()
+        return [row.id for row in rows]
+
+    def assign_order(self, reservation_ids: List[int], order_id: int) -> None:
+        db.session.execute(
+            update(InventoryReservation)
+            .where(InventoryReservation.id.in_(reservation_ids))
+            .values(order_id=order_id),
+            execution_options={'synchronize_session': 'evaluate'})
+
+    def transition(self, reservation_ids: List[int], new_status: str,
+                   unexpired_only=False) -> List[int]:
+        """
+        Move reservations still in the reserved state to new_status.
+        Returns the ids actually moved, so a hold is only released or
+        committed once even if the sweeper races with checkout.
+        """
+        if not reservation_ids:
+            return []
+        conditions = [InventoryReservation.id.in_(reservation_ids),
+                      InventoryReservation.status == RESERVED]
+        if unexpired_only:
+            conditions.append(
+                InventoryReservation.expires_at > datetime.utcnow())
+        rows = db.session.execute(
+            update(InventoryReservation)
+            .where(*conditions)
+            .values(status=new_status)
+            .returning(InventoryReservation.id),
+            execution_options={'synchronize_session': 'fetch'}).all()
+        return [row.id for row in rows]
+
+    def expire_batch(self, now: datetime, limit: int) -> List[Dict]:
+        """
+        Mark up to `limit` overdue holds as expired (oldest first) and
+        return their product_id, quantity and order_id. Does not commit.
+        """
+        overdue = db.session.query(InventoryReservation.id).filter(
+            InventoryReservation.status == RESERVED,
+            InventoryReservation.expires_at <= now
+        ).order_by(InventoryReservation.expires_at).limit(limit).with_for_update(
+            skip_locked=True).all()
+        if not overdue:
+            return []
+
+        table = InventoryReservation.__table__
+        rows = db.session.execute(
+            update(table)
+            .where(table.c.id.in_([row.id for row in overdue]),
+                   table.c.status == RESERVED)
+            .values(status=ReservationStatus.EXPIRED.value)
+            .returning(table.c.product_id, table.c.quantity,
+                       table.c.order_id)).all()
+        return [row._asdict() for row in rows]
+
+    def cancel_placed_orders(self, order_ids: List[int]) -> int:
+        """Cancel orders that never got past 'placed'. Does not commit."""
+        if not order_ids:
+            return 0
+        result = db.session.execute(
+            update(Order.__table__)
+            .where(Order.__table__.c.id.in_(order_ids),
+                   Order.__table__.c.status == 'placed')
+            .values(status='cancelled', updated_at=datetime.utcnow()))
+        return result.rowcount
+
+    def get_availability(self, product_id: int):
+        """
+        (stock, reserved) for a product in one query, reserved being the
+        quantity held by active reservations; None if the product is missing
+        """
+        reserved = select(
+            func.coalesce(func.sum(InventoryReservation.quantity), 0)
+        ).where(
+            InventoryReservation.product_id == Product.id,
+            InventoryReservation.status == RESERVED
+        ).scalar_subquery()
+        return db.session.query(Product.stock, reserved).filter(
+            Product.id == product_id).first()
@@ -14,6 +14,9 @@ class UserRepository:
         db.session.commit()
         return user
 
+    def get_users_by_type(self, user_type):
+        return User.query.filter_by(user_type=user_type).all()
+
     def get_user_count(self):
         return User.query.count()
 
@@ -10,6 +10,8 @@ from models.order import Order
 from models.order_item import OrderItem
 from models.payment import Payment
 from models.idempotency_key import IdempotencyKey
+from models.inventory_reservation import InventoryReservation
+from repositories.cart_repository import CartRepository
 from main import app  # to get the app context
 import uuid
 
@@ -20,6 +22,7 @@ def seed_database():
         # Clear existing data (optional, for fresh start)
         print("Clearing existing data...")
         db.session.query(IdempotencyKey).delete()
+        db.session.query(InventoryReservation).delete()
         db.session.query(OrderItem).delete()
         
         # Need to clear payment_id from orders first before deleting payments
@@ -216,16 +219,12 @@ def seed_database():
         
         # Create a cart with items for customer1
         print("Creating sample cart...")
-        cart1 = Cart(user_id=customer1.id)
-        db.session.add(cart1)
-        db.session.commit()
+        cart_repository = CartRepository()
+        cart1 = cart_repository.get_or_create_cart(customer1.id)
         
-        # Add some items to customer1's cart
-        cart_item1 = CartItem(cart_id=cart1.id, product_id=products[0].id, quantity=1)
-        cart_item2 = CartItem(cart_id=cart1.id, product_id=products[1].id, quantity=2)
-        db.session.add(cart_item1)
-        db.session.add(cart_item2)
-        db.session.commit()
+        # Add some items to customer1's cart (keeps its totals in step)
+        cart_repository.add_item(cart1, products[0], 1)
+        cart_repository.add_item(cart1, products[1], 2)
         
         # Create sample orders
         print("Creating sample orders...")
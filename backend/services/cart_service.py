@@ -1,3 +1,7 @@
+BATCH_OPERATIONS = ('add', 'set', 'remove')
+MAX_BATCH_SIZE = 200
+
+
 class CartService:
     def __init__(self, cart_repo, product_repo):
         self.cart_repo = cart_repo
@@ -13,17 +17,107 @@ class CartService:
 
         cart = self.cart_repo.get_or_create_cart(user_id)
         self.cart_repo.add_item(cart, product, quantity)
-        return cart
+        return self.cart_repo.get_cart_with_items(user_id)
 
     def view_cart(self, user_id):
-        cart = self.cart_repo.get_cart(user_id)
+        cart = self.cart_repo.get_cart_with_items(user_id)
         if not cart:
             raise ValueError("Cart is empty")
         return cart
 
+    def get_summary(self, user_id):
+        """Item count and total for the cart badge, from the carts row"""
+        summary = self.cart_repo.get_summary(user_id)
+        if not summary:
+            return {"id": None, "item_count": 0, "total": 0.0}
+        return {
+            "id": summary.id,
+            "item_count": summary.item_count,
+            "total": round(summary.subtotal, 2),
+        }
+
     def remove_from_cart(self, user_id, item_id):
         cart = self.cart_repo.get_cart(user_id)
         if not cart:
             raise ValueError("Cart not found")
         self.cart_repo.remove_item(cart, item_id)
-        return cart
+        return self.cart_repo.get_cart_with_items(user_id)
+
+    def apply_batch(self, user_id, operations):
+        """
+        Apply add / set / remove operations in order as one transaction.
+        Every product involved is loaded with a single query for the stock
+        check; nothing is applied if any operation is invalid.
+        """
+        if not isinstance(operations, list) or not operations:
+            raise ValueError("operations must be a non-empty list")
+        if len(operations) > MAX_BATCH_SIZE:
+            raise ValueError(
+                f"At most {MAX_BATCH_SIZE} operations per batch")
+
+        cart = self.cart_repo.get_or_create_cart(user_id)
+        lines = self.cart_repo.get_item_quantities(cart.id)
+        product_by_item = {item_id: product_id
+                           for product_id, (item_id, _) in lines.items()}
+        quantities = {product_id: quantity
+                      for product_id, (_, quantity) in lines.items()}
+
+        touched = set()
+        for index, operation in enumerate(operations):
+            try:
+                op, product_id, quantity = self._parse_operation(
+                    operation, product_by_item)
+            except ValueError as e:
+                raise ValueError(f"Operation {index}: {e}")
+
+            touched.add(product_id)
+            if op == 'add':
+                quantities[product_id] = quantities.get(product_id, 0) + quantity
+            elif op == 'set':
+                quantities[product_id] = quantity
+            else:
+                quantities[product_id] = 0
+
+        # One query for every product the batch adds, changes or removes
+        to_check = [pid for pid in touched if quantities[pid] > 0]
+        products = {product.id: product
+                    for product in self.product_repo.get_by_ids(
+                        sorted(pid for pid in touched
+                               if quantities[pid] > 0 or pid in lines))}
+        missing = sorted(pid for pid in to_check if pid not in products)
+        if missing:
+            raise ValueError(f"Products not found: {missing}")
+        short = sorted(pid for pid in to_check
+                       if products[pid].stock < quantities[pid])
+        if short:
+            raise ValueError(f"Not enough stock available for products: {short}")
+
+        self.cart_repo.apply_item_changes(
+            cart,
+            {pid: quantities[pid] for pid in to_check},
+            [pid for pid in touched if quantities[pid] == 0 and pid in lines])
+        return self.cart_repo.get_cart_with_items(user_id)
+
+    def _parse_operation(self, operation, product_by_item):
+        if not isinstance(operation, dict):
+            raise ValueError("must be an object")
+        op = operation.get('op')
+        if op not in BATCH_OPERATIONS:
+            raise ValueError("op must be one of add, set, remove")
+
+        product_id = operation.get('product_id')
+        if product_id is None and op == 'remove' and 'item_id' in operation:
+            product_id = product_by_item.get(operation['item_id'])
+            if product_id is None:
+                raise ValueError("Cart item not found")
+        if not isinstance(product_id, int) or isinstance(product_id, bool):
+            raise ValueError("product_id must be an integer")
+
+        quantity = 0
+        if op != 'remove':
+            quantity = operation.get('quantity', 1 if op == 'add' else None)
+            if not isinstance(quantity, int) or isinstance(quantity, bool):
+                raise ValueError("quantity must be an integer")
+            if quantity < (1 if op == 'add' else 0):
+                raise ValueError("quantity is out of range")
+        return op, product_id, quantity
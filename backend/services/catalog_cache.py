@@ -0,0 +1,105 @@
+"""
+Versioned in-process caches for serialized catalog responses and products
+"""
+import time
+from threading import Lock
+
+
+class CatalogCache:
+    """
+    Holds serialized product pages and category lists keyed by request.
+
+    Every catalog mutation (product create, update, delete, import, stock
+    adjustment) bumps the version, which drops all entries. Stock taken and
+    returned by checkouts does not: a busy store would empty the cache on
+    every order, so listed stock levels may lag by up to the TTL. The cache
+    is per process, so the TTL also bounds staleness when several workers
+    run side by side.
+    """
+
+    def __init__(self, ttl_seconds=30, max_entries=512):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._version = 0
+        self._entries = {}  # key -> (expires_at, value)
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get_or_set(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            version = self._version
+
+        # Build outside the lock; loader errors are never cached
+        value = loader()
+
+        with self._lock:
+            # Only store if no mutation happened while we were loading
+            if version == self._version:
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+                self._entries[key] = (now + self.ttl_seconds, value)
+        return value
+
+    def bump(self) -> int:
+        """Invalidate every entry after a catalog mutation"""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            return self._version
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'version': self._version,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class ProductFragmentCache:
+    """
+    Serialized product dicts keyed by product id and row version, shared by
+    the catalog, cart and order serializers. A product's entry is replaced
+    as soon as its row version changes.
+    """
+
+    def __init__(self, max_entries=50000):
+        self.max_entries = max_entries
+        self._fragments = {}  # product_id -> (version, fragment)
+        self._lock = Lock()
+
+    def get_or_build(self, product_id, version, build):
+        entry = self._fragments.get(product_id)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        fragment = build()
+        with self._lock:
+            if len(self._fragments) >= self.max_entries:
+                self._fragments.clear()
+            self._fragments[product_id] = (version, fragment)
+        return fragment
+
+    def invalidate(self, product_id):
+        with self._lock:
+            self._fragments.pop(product_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
@@ -1,16 +1,23 @@
-from typing import Dict
+from datetime import datetime
+from typing import Dict, Optional
+
+from flask import current_app
+
+from domain.payment_strategy import PaymentResult, PaymentStatus
 from models.order import Order
-from models.order_item import OrderItem
-from models.idempotency_key import IdempotencyKey
+from models.payment import Payment
+from repositories.cart_repository import CartRepository
+from repositories.outbox_repository import OutboxRepository
 from services.inventory_service import InventoryService
 from services.payment_service import PaymentService
 from services.invoice_service import InvoiceService
 from services.receipt_service import ReceiptService
 from services.notification_service import NotificationService
-from database.db import db
-import json
-import hashlib
-from datetime import datetime, timedelta
+from database.db import db, unit_of_work
+from services.idempotency_service import (
+    IdempotencyConflictError, IdempotencyService)
+
+CHECKOUT_ENDPOINT = '/api/orders/checkout'
 
 
 class CheckoutService:
@@ -21,7 +28,11 @@ class CheckoutService:
                  receipt_service: ReceiptService,
                  notification_service: NotificationService,
                  order_repository,
-                 payment_repository):
+                 payment_repository,
+                 cart_repository=None,
+                 outbox_repository=None,
+                 idempotency_service=None,
+                 outbox_worker=None):
 
         self.inventory_service = inventory_service
         self.payment_service = payment_service
@@ -30,161 +41,388 @@ class CheckoutService:
         self.notification_service = notification_service
         self.order_repository = order_repository
         self.payment_repository = payment_repository
+        self.cart_repository = cart_repository or CartRepository()
+        self.outbox_repository = outbox_repository or OutboxRepository()
+        self.idempotency_service = idempotency_service or IdempotencyService()
+        # Woken after each checkout so notifications go out at once
+        self.outbox_worker = outbox_worker
 
     def process_checkout(self, cart, shipping_address, billing_address,
                          payment_details, customer_id, idempotency_key: str) -> Dict:
         """
-        Enhanced checkout with inventory reservation and proper error handling
+        Enhanced checkout with inventory reservation and proper error handling.
+
+        Runs in three phases so no database connection is held while the
+        payment gateway is working:
+        1. one transaction holds the stock and records the pending order
+           and payment;
+        2. the gateway call runs on the payment executor, outside any
+           transaction;
+        3. one transaction records the outcome: paid (invoice, receipt,
+           cart cleared) or declined (holds released, order cancelled),
+           together with the outbox events that notify the customer.
+        A gateway call that timed out may still go through, so its order,
+        payment and holds stay pending (202) until the payment reconciler
+        learns the outcome from the gateway (see reconcile_payment). If
+        phase 3 fails after the payment went through, it is refunded.
+
+        The idempotency key is claimed before any of this, so a concurrent
+        retry waits for and replays this request's response instead of
+        charging the customer twice.
         """
+        if idempotency_key:
+            try:
+                state, response, status_code = self.idempotency_service.begin(
+                    idempotency_key, customer_id, CHECKOUT_ENDPOINT)
+            except IdempotencyConflictError as e:
+                return {'success': False, 'error': str(e), 'conflict': True}
+            if state == 'completed':
+                # Return cached response for duplicate request
+                response = response or {
+                    'success': False, 'error': 'Stored response unavailable'}
+                return {**response, 'replayed': True,
+                        'status_code': status_code}
+            if state == 'in_progress':
+                return {
+                    'success': False,
+                    'in_progress': True,
+                    'error': 'A checkout with this Idempotency-Key is '
+                             'still in progress'
+                }
+
         try:
-            # Check for existing idempotency key
-            if idempotency_key:
-                existing_key = IdempotencyKey.query.filter_by(
-                    key=idempotency_key,
-                    user_id=customer_id,
-                    endpoint='/api/orders/checkout'
-                ).first()
-
-                if existing_key:
-                    # Return cached response for duplicate request
-                    try:
-                        cached_data = json.loads(existing_key.response_data)
-                        return cached_data
-                    except (json.JSONDecodeError, TypeError):
-                        # If cached data is corrupted, continue with processing
-                        pass
-
-            # 1. Validate cart and inventory
-            if not cart or not cart.items:
-                result = {'success': False, 'error': 'Cart is empty'}
-                self._store_idempotency_result(
-                    idempotency_key, customer_id, result, 400)
+            with unit_of_work():
+                result, pending = self._prepare_checkout(
+                    cart, shipping_address, billing_address,
+                    customer_id, idempotency_key)
+            if result is not None:
                 return result
 
-            # 2. Reserve inventory
-            reservation_result = self.inventory_service.reserve_items(
-                cart.items, f"checkout_{customer_id}"
-            )
-
-            if not reservation_result['success']:
-                result = {
-                    'success': False,
-                    'error': reservation_result['error']
-                }
+            # The commit above returned the connection to the pool
+            payment_result = self.payment_service.authorize(
+                pending['amount'], payment_details, pending['gateway_key'])
+            result = self._complete_checkout(
+                pending, payment_result, cart, customer_id, idempotency_key)
+        except Exception as e:
+            result = {
+                'success': False,
+                'error': f'Checkout failed: {str(e)}'
+            }
+            with unit_of_work():
                 self._store_idempotency_result(
-                    idempotency_key, customer_id, result, 400)
-                return result
+                    idempotency_key, customer_id, result, 500)
+            return result
 
-            reservations = reservation_result['reservations']
+        # Notifications were recorded in the outbox with the order
+        if self.outbox_worker is not None:
+            self.outbox_worker.wake()
+        return result
 
-            try:
-                # 3. Create order
-                order = self._create_order_from_cart(
-                    cart, shipping_address, billing_address, customer_id
-                )
+    def _prepare_checkout(self, cart, shipping_address, billing_address,
+                          customer_id, idempotency_key):
+        """
+        Phase 1. Returns (result, None) when checkout ends here, otherwise
+        (None, pending) with the plain ids and amount the later phases need.
+        """
+        # 1. Validate cart and inventory
+        if not cart or not cart.items:
+            result = {'success': False, 'error': 'Cart is empty'}
+            self._store_idempotency_result(
+                idempotency_key, customer_id, result, 400)
+            return result, None
 
-                # 4. Process payment
-                payment_result = self.payment_service.process_order_payment(
-                    order, payment_details, idempotency_key)
+        # 2. Reserve inventory
+        reservation_result = self.inventory_service.reserve_items(cart.items)
 
-                if not payment_result['success']:
-                    # Release inventory on payment failure
-                    for reservation in reservations:
-                        self.inventory_service.release_reservation(reservation)
+        if not reservation_result['success']:
+            result = {
+                'success': False,
+                'error': reservation_result['error']
+            }
+            self._store_idempotency_result(
+                idempotency_key, customer_id, result, 400)
+            return result, None
 
-                    order.status = 'cancelled'
-                    db.session.commit()
-
-                    # Send SSE notification for payment failure
-                    from services.sse_service import sse_service
-                    sse_service.send_payment_failed(
-                        customer_id, order.id, payment_result['message']
-                    )
-
-                    result = {
-                        'success': False,
-                        'error': payment_result['message'],
-                        'order_id': order.id
-                    }
-                    self._store_idempotency_result(
-                        idempotency_key, customer_id, result, 400)
-                    return result
-
-                # 5. Update order status
-                order.status = 'paid'
-                order.payment_id = payment_result['payment'].id
-
-                # 6. Generate invoice
-                invoice = self.invoice_service.generate_invoice(order)
-
-                # 7. Generate receipt (proof of payment)
-                receipt = self.receipt_service.generate_receipt(
-                    payment_result['payment'],
-                    order
-                )
-
-                # 8. Clear cart
-                self._clear_cart(cart)
-
-                # 9. Send notifications
-                self.notification_service.send_order_confirmation(
-                    order, invoice)
-
-                # 10. Send SSE notification for payment completion
-                from services.sse_service import sse_service
-                sse_service.send_order_status_update(
-                    customer_id, order.id, 'placed', 'paid'
-                )
-                sse_service.send_invoice_generated(
-                    customer_id, order.id, invoice.invoice_number
-                )
-
-                db.session.commit()
-
-                result = {
-                    'success': True,
-                    'order': order,
-                    'payment': payment_result['payment'],
-                    'invoice': invoice,
-                    'receipt': receipt
-                }
+        reservations = reservation_result['reservations']
 
-                # Store serializable version for idempotency
-                serializable_result = {
-                    'success': True,
-                    'order_id': order.id,
-                    'payment_id': payment_result['payment'].id,
-                    'invoice_number': invoice.invoice_number,
-                    'receipt_number': receipt.receipt_number
-                }
-                self._store_idempotency_result(
-                    idempotency_key, customer_id, serializable_result, 201)
-                return result
+        # 3. Create order and its pending payment
+        order = self._create_order_from_cart(
+            cart, shipping_address, billing_address, customer_id
+        )
+        self.inventory_service.assign_order(reservations, order.id)
+        # The gateway key is kept on the payment to reconcile it later
+        gateway_key = idempotency_key or f"order_{order.id}"
+        payment = self.payment_service.create_payment(
+            order.id, order.total_amount, "card", gateway_key)
+
+        return None, {
+            'order_id': order.id,
+            'payment_id': payment.id,
+            'amount': order.total_amount,
+            'gateway_key': gateway_key,
+            'reservation_ids': [reservation.id for reservation in reservations]
+        }
 
-            except Exception as e:
-                # Rollback inventory on any error
-                for reservation in reservations:
-                    self.inventory_service.release_reservation(reservation)
-                raise e
+    def _complete_checkout(self, pending, payment_result, cart, customer_id,
+                           idempotency_key):
+        """Phase 3, undoing the checkout (and refunding) if it fails"""
+        try:
+            if payment_result.success:
+                # Numbers may need a block from number_sequences; take them
+                # while no transaction is open
+                pending['invoice_number'] = (
+                    self.invoice_service.next_invoice_number())
+                pending['receipt_number'] = (
+                    self.receipt_service.next_receipt_number())
+            with unit_of_work():
+                return self._finalize_checkout(
+                    pending, payment_result, cart, customer_id,
+                    idempotency_key)
+        except Exception:
+            self._abandon_checkout(pending, payment_result)
+            raise
+
+    def reconcile_payment(self, payment_id) -> Optional[Dict]:
+        """
+        Settle a payment left pending by a gateway timeout or a request
+        that died mid-checkout: ask the gateway what became of it and
+        finish the checkout the same way phase 3 would have (the stored
+        response of its Idempotency-Key included). Returns the checkout
+        result, or None while the outcome is still unknown.
+        """
+        with unit_of_work():
+            payment = db.session.get(Payment, payment_id)
+            if payment is None or payment.status != PaymentStatus.PENDING.value:
+                return None
+            order = self.order_repository.find_by_id(payment.order_id)
+            customer_id = order.user_id
+            gateway_key = payment.idempotency_key
+            pending = {
+                'order_id': order.id,
+                'payment_id': payment.id,
+                'amount': payment.amount,
+                'gateway_key': gateway_key,
+                'reservation_ids': self.inventory_service.get_reserved_ids(
+                    order.id)
+            }
+
+        payment_result = (self.payment_service.lookup(gateway_key)
+                          if gateway_key else None)
+        if payment_result is None:
+            payment_result = PaymentResult(
+                success=False,
+                transaction_id="",
+                status=PaymentStatus.CANCELLED,
+                message="Payment was never processed by the gateway",
+                amount=pending['amount'],
+                timestamp=datetime.utcnow()
+            )
+        elif payment_result.status == PaymentStatus.PENDING:
+            return None
 
+        # The checkout's Idempotency-Key doubles as the gateway key
+        idempotency_key = None if gateway_key.startswith('order_') else gateway_key
+        cart = self.cart_repository.get_cart(customer_id)
+        try:
+            result = self._complete_checkout(
+                pending, payment_result, cart, customer_id, idempotency_key)
         except Exception as e:
-            db.session.rollback()
             result = {
                 'success': False,
                 'error': f'Checkout failed: {str(e)}'
             }
+            with unit_of_work():
+                self._store_idempotency_result(
+                    idempotency_key, customer_id, result, 500)
+        if self.outbox_worker is not None:
+            self.outbox_worker.wake()
+        return result
+
+    def _finalize_checkout(self, pending, payment_gateway_result, cart,
+                           customer_id, idempotency_key):
+        """Phase 3. Returns the checkout result."""
+        order = self.order_repository.find_by_id(pending['order_id'])
+        # Locked so the request and the payment reconciler settle it once
+        payment = db.session.get(
+            Payment, pending['payment_id'], with_for_update=True,
+            populate_existing=True)
+        if payment.status != PaymentStatus.PENDING.value:
+            return self._pending_result(
+                order, 'Payment was already settled; check the order status')
+
+        status = payment_gateway_result.status
+        if status == PaymentStatus.PENDING:
+            # The gateway may still authorize: leave the order, payment and
+            # holds pending (and the Idempotency-Key claimed) for the
+            # payment reconciler
+            payment.error_message = payment_gateway_result.message
+            return self._pending_result(
+                order, 'Payment is being confirmed; check the order status')
+
+        reservations = self.inventory_service.get_reservations(
+            pending['reservation_ids'])
+
+        if status == PaymentStatus.CANCELLED:
+            # The gateway never saw the payment: undo the checkout and free
+            # the keys so a retry with the same Idempotency-Key starts over
+            for reservation in reservations:
+                self.inventory_service.release_reservation(reservation)
+            order.status = 'cancelled'
+            payment.status = PaymentStatus.CANCELLED.value
+            payment.error_message = payment_gateway_result.message
+            payment.idempotency_key = None
+            if idempotency_key:
+                self.idempotency_service.release(
+                    idempotency_key, customer_id, CHECKOUT_ENDPOINT)
+            return {
+                'success': False,
+                'retry': True,
+                'error': payment_gateway_result.message,
+                'order_id': order.id
+            }
+
+        # 4. Record the payment outcome
+        payment_result = self.payment_service.record_result(
+            payment, payment_gateway_result)
+
+        if not payment_result['success']:
+            # Release inventory on payment failure; the declined payment
+            # and cancelled order are still recorded
+            for reservation in reservations:
+                self.inventory_service.release_reservation(reservation)
+
+            order.status = 'cancelled'
+
+            result = {
+                'success': False,
+                'error': payment_result['message'],
+                'order_id': order.id
+            }
             self._store_idempotency_result(
-                idempotency_key, customer_id, result, 500)
+                idempotency_key, customer_id, result, 400)
+
+            # SSE notification for payment failure
+            self._enqueue_sse('send_payment_failed', customer_id, order.id,
+                              payment_result['message'])
             return result
 
+        # Settled late, after the sweeper or a failed attempt cancelled it
+        if order.status != 'placed':
+            raise ValueError('Order was cancelled before payment completed')
+        # Holds become permanent; an expired one may already be resold
+        if not self.inventory_service.commit_reservations(reservations):
+            raise ValueError('Inventory reservation expired')
+
+        # 5. Update order status
+        order.status = 'paid'
+        order.payment_id = payment.id
+
+        # 6. Generate invoice
+        invoice = self.invoice_service.generate_invoice(
+            order, notify=False, invoice_number=pending['invoice_number'])
+
+        # 7. Generate receipt (proof of payment)
+        receipt = self.receipt_service.generate_receipt(
+            payment, order, notify=False,
+            receipt_number=pending['receipt_number'])
+
+        # 8. Clear cart
+        if cart is not None:
+            self._clear_cart(cart)
+
+        result = {
+            'success': True,
+            'order': order,
+            'payment': payment,
+            'invoice': invoice,
+            'receipt': receipt
+        }
+
+        # Store serializable version for idempotency
+        serializable_result = {
+            'success': True,
+            'order_id': order.id,
+            'payment_id': payment.id,
+            'invoice_number': invoice.invoice_number,
+            'receipt_number': receipt.receipt_number,
+            'status': order.status
+        }
+        self._store_idempotency_result(
+            idempotency_key, customer_id, serializable_result, 201)
+
+        # 9. Customer notifications, 10. SSE notification for payment
+        # completion; delivered by the outbox workers after commit
+        self.outbox_repository.add('order_confirmation', {
+            'order_id': order.id, 'invoice_id': invoice.id})
+        self.outbox_repository.add('invoice_notification', {
+            'invoice_id': invoice.id})
+        self.outbox_repository.add('receipt_email', {
+            'receipt_id': receipt.id})
+        self._enqueue_sse('send_order_status_update', customer_id, order.id,
+                          'placed', 'paid')
+        self._enqueue_sse('send_invoice_generated', customer_id, order.id,
+                          invoice.invoice_number)
+        return result
+
+    def _enqueue_sse(self, method, *args):
+        self.outbox_repository.add('sse', {'method': method, 'args': list(args)})
+
+    def _pending_result(self, order, message):
+        return {
+            'success': False,
+            'pending': True,
+            'error': message,
+            'order_id': order.id
+        }
+
+    def _abandon_checkout(self, pending, payment_result):
+        """
+        Best effort after phase 3 failed: refund a payment that went
+        through, release the holds and cancel the order right away
+        """
+        logger = current_app.logger
+        refund = None
+        if payment_result.success:
+            refund = self.payment_service.refund(
+                payment_result.transaction_id, pending['amount'])
+            if not refund.success:
+                # The payment stays pending, so the reconciler retries
+                logger.error("Could not refund payment %s of order %s: %s",
+                             payment_result.transaction_id,
+                             pending['order_id'], refund.message)
+        try:
+            with unit_of_work():
+                for reservation in self.inventory_service.get_reservations(
+                        pending['reservation_ids']):
+                    self.inventory_service.release_reservation(reservation)
+                order = self.order_repository.find_by_id(pending['order_id'])
+                if order and order.status == 'placed':
+                    order.status = 'cancelled'
+                if refund is not None and refund.success:
+                    payment = db.session.get(Payment, pending['payment_id'])
+                    payment.status = PaymentStatus.REFUNDED.value
+                    payment.transaction_id = payment_result.transaction_id
+        except Exception:
+            # The reservation sweeper releases the holds after the TTL
+            logger.exception(
+                "Could not abandon checkout %s", pending['order_id'])
+
     def _create_order_from_cart(
             self, cart, shipping_address, billing_address, customer_id):
-        """Reuse your existing order creation logic with enhancements"""
+        """
+        Build the order from its lines, priced from one product lookup; the
+        total (and so the amount charged) is the sum of those lines, as in
+        OrderService, not the cart's running subtotal
+        """
+        lines = self.order_repository.order_lines_from_cart(cart.items)
+        total_amount = sum(
+            line['quantity'] * line['unit_price'] for line in lines)
+
         order = Order(
             user_id=customer_id,
             customer_name=cart.user.name if cart.user else "Unknown",
             customer_email=cart.user.email if cart.user else "unknown@example.com",
-            total_amount=cart.get_total(),
+            total_amount=total_amount,
             status='placed',  # Will be updated after payment
             shipping_street=shipping_address.get('street'),
             shipping_city=shipping_address.get('city'),
@@ -198,80 +436,17 @@ class CheckoutService:
             billing_country=billing_address.get('country')
         )
 
-        db.session.add(order)
-        db.session.flush()  # Get order ID without committing
-
-        # Create order items from cart
-        for cart_item in cart.items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=cart_item.product_id,
-                product_name=cart_item.product.name,
-                quantity=cart_item.quantity,
-                unit_price=cart_item.product.price,   # Price snapshot
-            )
-            db.session.add(order_item)
-
-        return order
+        # All lines in one bulk INSERT
+        return self.order_repository.create_with_items(order, lines)
 
     def _clear_cart(self, cart):
         """Clear cart after successful order"""
-        for item in cart.items:
-            db.session.delete(item)
+        self.cart_repository.delete_items(cart)
 
     def _store_idempotency_result(
             self, idempotency_key, user_id, result, status_code):
         """Store the result of a checkout operation for idempotency"""
         if not idempotency_key:
             return
-
-        # Create hash of request data for additional validation (optional)
-        request_data = {
-            'user_id': user_id,
-            'result': result
-        }
-        request_hash = hashlib.sha256(
-            json.dumps(
-                request_data,
-                sort_keys=True).encode()).hexdigest()
-
-        # Store or update idempotency key
-        key_record = IdempotencyKey(
-            key=idempotency_key,
-            user_id=user_id,
-            endpoint='/api/orders/checkout',
-            request_hash=request_hash,
-            response_data=json.dumps(result),
-            status_code=status_code,
-            expires_at=datetime.utcnow() + timedelta(days=7)  # Expire after 7 days
-        )
-
-        db.session.add(key_record)
-
-    def is_key_processed(self, user_id, idempotency_key):
-        """Check if an idempotency key has already been processed"""
-        if not idempotency_key:
-            return False
-
-        key_record = IdempotencyKey.query.filter_by(
-            key=idempotency_key,
-            user_id=user_id,
-            endpoint='/api/orders/checkout'
-        ).first()
-
-        return key_record is not None
-
-    def get_cached_result(self, user_id, idempotency_key):
-        """Get cached result for an idempotency key"""
-        key_record = IdempotencyKey.query.filter_by(
-            key=idempotency_key,
-            user_id=user_id,
-            endpoint='/api/orders/checkout'
-        ).first()
-
-        if key_record and key_record.response_data:
-            try:
-                return json.loads(key_record.response_data)
-            except json.JSONDecodeError:
-                return None
-        return None
+        self.idempotency_service.complete(
+            idempotency_key, user_id, CHECKOUT_ENDPOINT, result, status_code)
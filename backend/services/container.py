@@ -0,0 +1,163 @@
+"""
+Application-wide service container: every service, cache, pool and
+background job is built once per app from its config and shared by all
+requests and blueprints
+"""
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from domain.payment_strategy import MockPaymentStrategy
+from repositories.cart_repository import CartRepository
+from repositories.invoice_repository import InvoiceRepository
+from repositories.order_repository import OrderRepository
+from repositories.payment_repository import PaymentRepository
+from repositories.product_repository import ProductRepository
+from repositories.user_repository import UserRepository
+from services.auth_service import AuthService
+from services.cart_service import CartService
+from services.catalog_cache import CatalogCache, ProductFragmentCache
+from services.checkout_service import CheckoutService
+from services.idempotency_purger import IdempotencyKeyPurger
+from services.idempotency_service import IdempotencyService, ResponseCache
+from services.inventory_service import InventoryService
+from services.invoice_service import InvoiceService
+from services.notification_service import NotificationService
+from services.number_allocator import NumberAllocator
+from services.order_service import OrderService
+from services.outbox_worker import OutboxWorker
+from services.payment_executor import PaymentExecutor
+from services.payment_reconciler import PaymentReconciler
+from services.payment_service import PaymentProcessor, PaymentService
+from services.product_import_service import ProductImportService
+from services.product_service import ProductService
+from services.receipt_service import ReceiptService
+from services.registry import EXTENSION_KEY, get_service  # noqa: F401
+from services.reporting_service import ReportingService
+from services.reservation_sweeper import ReservationSweeper
+from services.search_index import ProductSearchIndex
+
+
+class ServiceContainer:
+    """
+    Holds the long-lived service singletons. Services and repositories
+    keep no per-request state (the database session is scoped by
+    Flask-SQLAlchemy), so one instance of each is safe to share between
+    request threads, and caches and pools inside them are shared too.
+    """
+
+    def __init__(self, config):
+        cart_repository = CartRepository()
+        product_repository = ProductRepository()
+        order_repository = OrderRepository()
+        payment_repository = PaymentRepository()
+
+        # --- Per-process caches and pools ---
+        self.catalog_cache = CatalogCache(
+            ttl_seconds=config['CATALOG_CACHE_TTL'],
+            max_entries=config['CATALOG_CACHE_MAX_ENTRIES'])
+        self.product_fragment_cache = ProductFragmentCache()
+        self.product_search_index = ProductSearchIndex(
+            ttl_seconds=config['SEARCH_INDEX_TTL'])
+        self.payment_executor = PaymentExecutor(
+            max_workers=config['PAYMENT_WORKERS'],
+            max_in_flight=config['PAYMENT_MAX_IN_FLIGHT'],
+            timeout_seconds=config['PAYMENT_TIMEOUT_SECONDS'])
+        self.idempotency_service = IdempotencyService(
+            cache=ResponseCache(config['IDEMPOTENCY_CACHE_SIZE']),
+            wait_seconds=config['IDEMPOTENCY_WAIT_SECONDS'],
+            claim_timeout=config['IDEMPOTENCY_CLAIM_TIMEOUT'],
+            ttl_days=config['IDEMPOTENCY_TTL_DAYS'])
+        self.number_allocator = NumberAllocator(
+            block_size=config['NUMBER_BLOCK_SIZE'])
+        # Generates resized variants of uploaded product images
+        self.image_executor = ThreadPoolExecutor(
+            max_workers=config['IMAGE_WORKERS'],
+            thread_name_prefix='image-variants')
+
+        self.notification_service = NotificationService()
+
+        # --- Background jobs (see start_background_jobs) ---
+        self.outbox_worker = OutboxWorker(
+            notification_service=self.notification_service)
+        self.reservation_sweeper = ReservationSweeper(
+            product_repo=product_repository)
+        self.idempotency_purger = IdempotencyKeyPurger(
+            service=self.idempotency_service)
+        self._jobs_started = False
+        self._jobs_lock = Lock()
+
+        # --- Services ---
+
+        self.auth_service = AuthService(UserRepository())
+        self.cart_service = CartService(cart_repository, product_repository)
+        self.product_service = ProductService(
+            product_repository, cart_repository,
+            catalog_cache=self.catalog_cache,
+            fragment_cache=self.product_fragment_cache,
+            search_index=self.product_search_index)
+        self.product_service.attach(self.notification_service)
+        self.product_import_service = ProductImportService(
+            product_repository,
+            batch_size=config['PRODUCT_IMPORT_BATCH_SIZE'],
+            cart_repo=cart_repository,
+            catalog_cache=self.catalog_cache,
+            search_index=self.product_search_index)
+        self.order_service = OrderService(order_repository)
+        self.reporting_service = ReportingService()
+
+        self.inventory_service = InventoryService(
+            product_repository,
+            reservation_timeout_minutes=config['RESERVATION_TTL_MINUTES'])
+        self.payment_service = PaymentService(PaymentProcessor(
+            MockPaymentStrategy(
+                latency_seconds=config['PAYMENT_GATEWAY_LATENCY']),
+            self.payment_executor))
+        self.invoice_service = InvoiceService(
+            InvoiceRepository(), self.notification_service,
+            self.number_allocator)
+        self.receipt_service = ReceiptService(
+            self.notification_service, self.number_allocator)
+        self.checkout_service = CheckoutService(
+            inventory_service=self.inventory_service,
+            payment_service=self.payment_service,
+            invoice_service=self.invoice_service,
+            receipt_service=self.receipt_service,
+            notification_service=self.notification_service,
+            order_repository=order_repository,
+            payment_repository=payment_repository,
+            cart_repository=cart_repository,
+            idempotency_service=self.idempotency_service,
+            outbox_worker=self.outbox_worker)
+        self.payment_reconciler = PaymentReconciler(
+            self.checkout_service, payment_repository)
+
+    def init_app(self, app):
+        app.extensions[EXTENSION_KEY] = self
+        self.outbox_worker.init_app(app)
+        self.reservation_sweeper.init_app(app)
+        self.idempotency_purger.init_app(app)
+        self.payment_reconciler.init_app(app)
+        return self
+
+    def start_background_jobs(self, config):
+        """Start the jobs enabled in config; later calls do nothing"""
+        if self._jobs_started:
+            return
+        with self._jobs_lock:
+            if self._jobs_started:
+                return
+            if config['OUTBOX_ENABLED']:
+                self.outbox_worker.start()
+            if config['RESERVATION_SWEEPER_ENABLED']:
+                self.reservation_sweeper.start()
+            if config['IDEMPOTENCY_PURGE_ENABLED']:
+                self.idempotency_purger.start()
+            if config['PAYMENT_RECONCILE_ENABLED']:
+                self.payment_reconciler.start()
+            self._jobs_started = True
+
+    def stop_background_jobs(self):
+        self.outbox_worker.stop()
+        self.reservation_sweeper.stop()
+        self.idempotency_purger.stop()
+        self.payment_reconciler.stop()
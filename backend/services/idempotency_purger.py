@@ -0,0 +1,91 @@
+"""
+Background job deleting idempotency keys past their expires_at
+"""
+import threading
+import time
+from datetime import datetime
+
+from database.db import db
+from repositories.idempotency_repository import IdempotencyKeyRepository
+from services.idempotency_service import IdempotencyService
+
+
+class IdempotencyKeyPurger:
+    """
+    Periodically deletes expired idempotency keys in bounded batches, one
+    commit per batch, so the table and its unique index stay sized to the
+    retention window instead of growing with every checkout. Safe to run
+    in several processes at once.
+    """
+
+    def __init__(self, key_repo=None, service=None):
+        self.key_repo = key_repo or IdempotencyKeyRepository()
+        self.service = service or IdempotencyService()
+        self.app = None
+        self.interval_seconds = 3600
+        self.batch_size = 1000
+        self.max_batches = 100
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        """Configure from app.config; the jobs are started separately"""
+        self.app = app
+        self.interval_seconds = app.config['IDEMPOTENCY_PURGE_INTERVAL']
+        self.batch_size = app.config['IDEMPOTENCY_PURGE_BATCH_SIZE']
+        self.max_batches = app.config['IDEMPOTENCY_PURGE_MAX_BATCHES']
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='idempotency-purger', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def purge(self, now=None) -> dict:
+        """
+        Delete expired keys, at most max_batches batches per run so a large
+        backlog is worked off over several runs; call inside an app context
+        """
+        now = now or datetime.utcnow()
+        started = time.monotonic()
+        purged = 0
+        batches = 0
+        while batches < self.max_batches:
+            try:
+                deleted = self.key_repo.delete_expired(now, self.batch_size)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            if not deleted:
+                break
+            batches += 1
+            purged += len(deleted)
+            for cache_key in deleted:
+                self.service.cache.discard(cache_key)
+            if len(deleted) < self.batch_size:
+                break
+
+        return {
+            'purged': purged,
+            'batches': batches,
+            'seconds': round(time.monotonic() - started, 3)
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                with self.app.app_context():
+                    result = self.purge()
+                if result['purged']:
+                    print(f"Idempotency purger deleted {result['purged']} "
+                          f"expired keys in {result['batches']} batches "
+                          f"({result['seconds']}s)")
+            except Exception as e:
+                print(f"Idempotency purger failed: {e}")
+
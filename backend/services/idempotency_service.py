@@ -0,0 +1,179 @@
+"""
+Idempotency keys: an atomic in-progress claim taken before the work
+starts, and completed responses served from an in-process LRU cache
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+
+from sqlalchemy import delete, update
+
+from database.db import db, save_changes
+from database.dialect import dialect_insert
+from models.idempotency_key import IdempotencyKey
+
+IN_PROGRESS = 'in_progress'
+COMPLETED = 'completed'
+
+
+class IdempotencyConflictError(Exception):
+    """Raised when a key is reused by another user or for another endpoint"""
+
+    def __init__(self, message="Idempotency-Key was already used for another request"):
+        super().__init__(message)
+
+
+class ResponseCache:
+    """Thread-safe LRU of completed responses"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, cache_key):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+            return entry
+
+    def set(self, cache_key, value):
+        with self._lock:
+            self._entries[cache_key] = value
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, cache_key):
+        with self._lock:
+            self._entries.pop(cache_key, None)
+
+
+class IdempotencyService:
+    """
+    begin() either claims a key for the caller or returns the outcome of
+    the request that already used it:
+
+    - ('claimed', None, None): do the work, then call complete()
+    - ('completed', response, status_code): replay the stored response
+    - ('in_progress', None, None): the first request is still running
+      after waiting wait_seconds for it
+
+    The claim is an INSERT ... ON CONFLICT DO NOTHING on the unique key,
+    committed at once, so exactly one of several concurrent requests
+    carrying the same key gets to run.
+    """
+
+    def __init__(self, cache=None, wait_seconds=15.0, claim_timeout=120,
+                 ttl_days=7):
+        self.cache = cache or ResponseCache()
+        self.wait_seconds = wait_seconds
+        self.claim_timeout = claim_timeout
+        self.ttl_days = ttl_days
+
+    def begin(self, key, user_id, endpoint):
+        cache_key = (key, user_id, endpoint)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return (COMPLETED,) + cached
+
+        deadline = time.monotonic() + self.wait_seconds
+        delay = 0.05
+        while True:
+            if self._claim(key, user_id, endpoint):
+                return 'claimed', None, None
+
+            record = IdempotencyKey.query.filter_by(key=key).first()
+            db.session.commit()  # end the read so the next poll sees new data
+            if record is None:
+                continue  # purged between the insert and the read; retry
+            if record.user_id != user_id or record.endpoint != endpoint:
+                raise IdempotencyConflictError()
+
+            if record.status == COMPLETED:
+                response = self._decode(record.response_data)
+                self.cache.set(cache_key, (response, record.status_code))
+                return COMPLETED, response, record.status_code
+
+            if self._take_over_stale(record):
+                return 'claimed', None, None
+            if time.monotonic() >= deadline:
+                return IN_PROGRESS, None, None
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def complete(self, key, user_id, endpoint, response, status_code):
+        """
+        Store the response on the claimed key; a response already stored
+        is kept. Flushes only inside a unit of work, so it commits together
+        with the work it describes.
+        """
+        request_hash = hashlib.sha256(json.dumps(
+            {'user_id': user_id, 'result': response},
+            sort_keys=True).encode()).hexdigest()
+        db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key,
+                   IdempotencyKey.user_id == user_id,
+                   IdempotencyKey.endpoint == endpoint,
+                   IdempotencyKey.status == IN_PROGRESS)
+            .values(status=COMPLETED,
+                    request_hash=request_hash,
+                    response_data=json.dumps(response),
+                    status_code=status_code),
+            execution_options={'synchronize_session': False})
+        save_changes()
+
+    def release(self, key, user_id, endpoint):
+        """
+        Drop an in-progress claim so a retry with the same key runs the
+        request again. Flushes only inside a unit of work.
+        """
+        db.session.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.key == key,
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.endpoint == endpoint,
+                IdempotencyKey.status == IN_PROGRESS),
+            execution_options={'synchronize_session': False})
+        save_changes()
+
+    def _claim(self, key, user_id, endpoint):
+        now = datetime.utcnow()
+        stmt = dialect_insert(IdempotencyKey.__table__).values(
+            key=key,
+            user_id=user_id,
+            endpoint=endpoint,
+            status=IN_PROGRESS,
+            created_at=now,
+            expires_at=now + timedelta(days=self.ttl_days)
+        ).on_conflict_do_nothing(index_elements=['key'])
+        claimed = db.session.execute(stmt).rowcount == 1
+        db.session.commit()
+        return claimed
+
+    def _take_over_stale(self, record):
+        """Reclaim a key whose request died without completing"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.claim_timeout)
+        if record.created_at is None or record.created_at >= cutoff:
+            return False
+        taken = db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == record.id,
+                   IdempotencyKey.status == IN_PROGRESS,
+                   IdempotencyKey.created_at == record.created_at)
+            .values(created_at=datetime.utcnow()),
+            execution_options={'synchronize_session': False}).rowcount == 1
+        db.session.commit()
+        return taken
+
+    def _decode(self, response_data):
+        try:
+            return json.loads(response_data) if response_data else None
+        except (json.JSONDecodeError, TypeError):
+            return None
+
@@ -1,42 +1,51 @@
 from datetime import datetime, timedelta
 from typing import List, Dict
-from domain.inventory_reservation import InventoryReservation, ReservationStatus
+from domain.inventory_reservation import ReservationStatus
+from database.db import save_changes
+from models.inventory_reservation import InventoryReservation
+from repositories.reservation_repository import ReservationRepository
 
 
 class InventoryService:
-    def __init__(self, product_repository):
+    def __init__(self, product_repository, reservation_repository=None,
+                 reservation_timeout_minutes=30):
         self.product_repository = product_repository
-        self.reservation_timeout_minutes = 30  # 30 min reservation window
+        self.reservation_repository = (
+            reservation_repository or ReservationRepository())
+        self.reservation_timeout_minutes = reservation_timeout_minutes
 
-    def reserve_items(self, cart_items: List, order_id: str) -> Dict:
+    def reserve_items(self, cart_items: List, order_id: int = None) -> Dict:
         """Reserve inventory for checkout - Strategy Pattern"""
-        reservations = []
-
+        quantities = {}
         for item in cart_items:
-            product = self.product_repository.get_by_id(item.product_id)
+            quantities[item.product_id] = (
+                quantities.get(item.product_id, 0) + item.quantity)
 
-            if not product or product.stock < item.quantity:
-                return {
-                    'success': False,
-                    'error': f'Insufficient stock for {product.name}',
-                    'reservations': []
-                }
+        # Atomic conditional decrement; nothing is taken if any line is short
+        short = self.product_repository.reserve_stock(quantities)
+        if short is not None:
+            product_id, name = short
+            name = name or f'product {product_id}'
+            return {
+                'success': False,
+                'error': f'Insufficient stock for {name}',
+                'reservations': []
+            }
 
-            # Create reservation
-            reservation = InventoryReservation(
-                id=f"res_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{product.id}",
-                product_id=product.id,
-                quantity=item.quantity,
+        now = datetime.utcnow()
+        reservations = [
+            InventoryReservation(
+                product_id=product_id,
+                quantity=quantity,
                 order_id=order_id,
-                status=ReservationStatus.RESERVED,
-                expires_at=datetime.utcnow() + timedelta(minutes=self.reservation_timeout_minutes),
-                created_at=datetime.utcnow()
+                status=ReservationStatus.RESERVED.value,
+                expires_at=now + timedelta(minutes=self.reservation_timeout_minutes),
+                created_at=now
             )
-            reservations.append(reservation)
-
-            # Update product stock (reserved)
-            product.stock -= item.quantity
-            self.product_repository.update(product)
+            for product_id, quantity in sorted(quantities.items())
+        ]
+        self.reservation_repository.add_many(reservations)
+        save_changes()
 
         return {
             'success': True,
@@ -44,37 +53,56 @@ class InventoryService:
             'message': 'Inventory reserved successfully'
         }
 
+    def get_reservations(self, reservation_ids: List[int]) -> List[InventoryReservation]:
+        return self.reservation_repository.get_by_ids(reservation_ids)
+
+    def get_reserved_ids(self, order_id: int) -> List[int]:
+        """Ids of the order's holds that are still reserved"""
+        return self.reservation_repository.get_reserved_ids(order_id)
+
+    def assign_order(self, reservations: List[InventoryReservation],
+                     order_id: int) -> None:
+        """Link holds taken before the order existed to that order"""
+        self.reservation_repository.assign_order(
+            [reservation.id for reservation in reservations], order_id)
+
     def release_reservation(self, reservation: InventoryReservation) -> bool:
         """Release inventory reservation on payment failure - Observer Pattern"""
-        product = self.product_repository.get_by_id(reservation.product_id)
-        if product and reservation.status == ReservationStatus.RESERVED:
-            product.stock += reservation.quantity
-            reservation.status = ReservationStatus.RELEASED
-            self.product_repository.update(product)
-            return True
-        return False
+        released = self.reservation_repository.transition(
+            [reservation.id], ReservationStatus.RELEASED.value)
+        if not released:
+            return False  # already committed, released or expired
+        self.product_repository.restore_stock(
+            {reservation.product_id: reservation.quantity})
+        save_changes()
+        return True
+
+    def commit_reservations(
+            self, reservations: List[InventoryReservation]) -> bool:
+        """
+        Commit holds once the order is paid. False if any of them has
+        expired (its stock may already be back on sale)
+        """
+        ids = [reservation.id for reservation in reservations]
+        committed = self.reservation_repository.transition(
+            ids, ReservationStatus.COMMITTED.value, unexpired_only=True)
+        save_changes()
+        return len(committed) == len(ids)
 
     def commit_reservation(self, reservation: InventoryReservation) -> bool:
         """Commit reservation when order is shipped"""
-        if reservation.can_commit():
-            reservation.status = ReservationStatus.COMMITTED
-            # Stock already deducted during reservation
-            return True
-        return False
+        return self.commit_reservations([reservation])
 
-    def get_product_availability(self, product_id: str) -> Dict:
+    def get_product_availability(self, product_id: int) -> Dict:
         """Check available stock considering reservations"""
-        product = self.product_repository.get_by_id(product_id)
-        if not product:
+        row = self.reservation_repository.get_availability(product_id)
+        if not row:
             return {'available': 0, 'reserved': 0}
 
-        # Calculate reserved stock (simplified - in real app, query
-        # reservations)
-        reserved = 0  # Would query active reservations
-        available = max(0, product.stock - reserved)
-
+        # Reserved units were already taken out of stock
+        stock, reserved = row
         return {
-            'available': available,
+            'available': max(0, stock),
             'reserved': reserved,
-            'total_stock': product.stock
+            'total_stock': stock + reserved
         }
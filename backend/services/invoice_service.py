@@ -1,30 +1,38 @@
-import uuid
-from datetime import datetime
 from models.invoice import Invoice
+from services.number_allocator import NumberAllocator
+
+INVOICE_PREFIX = 'INV'
 
 
 class InvoiceService:
-    def __init__(self, invoice_repository, notification_service):
+    def __init__(self, invoice_repository, notification_service,
+                 number_allocator=None):
         self.invoice_repository = invoice_repository
         self.notification_service = notification_service
-
-    def generate_invoice(self, order) -> Invoice:
-        """Generate invoice for paid order - Observer Pattern"""
-        invoice_number = self._generate_invoice_number()
+        self.number_allocator = number_allocator or NumberAllocator()
+
+    def generate_invoice(self, order, notify=True,
+                         invoice_number=None) -> Invoice:
+        """
+        Generate invoice for paid order - Observer Pattern.
+        Pass notify=False when the caller delivers the notification itself
+        (checkout does so through the outbox), and invoice_number when it
+        was allocated ahead of the transaction.
+        """
+        invoice_number = invoice_number or self.next_invoice_number()
         invoice = Invoice(order=order, invoice_number=invoice_number)
 
         self.invoice_repository.save(invoice)
 
         # Notify customer
-        self.notification_service.send_invoice_notification(invoice)
+        if notify:
+            self.notification_service.send_invoice_notification(invoice)
 
         return invoice
 
-    def _generate_invoice_number(self) -> str:
-        """Generate unique invoice number"""
-        timestamp = datetime.utcnow().strftime('%Y%m%d')
-        unique_id = str(uuid.uuid4())[:8].upper()
-        return f"INV-{timestamp}-{unique_id}"
+    def next_invoice_number(self) -> str:
+        """Allocate the next invoice number, e.g. INV-20261017-000042"""
+        return self.number_allocator.next_number(INVOICE_PREFIX)
 
     def get_invoice_by_order(self, order_id: str) -> Invoice:
         """Retrieve invoice for order"""
@@ -0,0 +1,48 @@
+"""
+Hi-lo allocator for human-readable document numbers (invoices, receipts)
+"""
+from datetime import datetime
+from threading import Lock
+
+from repositories.number_sequence_repository import NumberSequenceRepository
+
+
+class NumberAllocator:
+    """
+    Hands out increasing numbers per prefix and day, e.g. INV-20261017-000042,
+    from blocks of block_size values reserved in number_sequences. Only the
+    first number of each block costs a database round trip. Values of a
+    block left unused when the process stops, or taken by a checkout that
+    later fails, are skipped: numbers may have gaps, but never repeat.
+
+    Each process draws its own blocks, so numbers issued by several
+    processes interleave by block rather than by time.
+    """
+
+    def __init__(self, sequence_repo=None, block_size=50):
+        self.sequence_repo = sequence_repo or NumberSequenceRepository()
+        self.block_size = block_size
+        self._blocks = {}  # prefix -> [sequence name, next value, block end]
+        self._lock = Lock()
+
+    def next_number(self, prefix: str, today=None) -> str:
+        """
+        Next number for prefix. When a block has to be reserved this opens
+        its own database connection, so call it outside a write transaction
+        on SQLite, which allows one writer at a time.
+        """
+        day = (today or datetime.utcnow()).strftime('%Y%m%d')
+        name = f"{prefix}-{day}"
+        with self._lock:
+            # One block per prefix; a new day starts a new sequence
+            block = self._blocks.get(prefix)
+            if block is None or block[0] != name or block[1] >= block[2]:
+                start = self.sequence_repo.reserve_block(name, self.block_size)
+                block = [name, start, start + self.block_size]
+                self._blocks[prefix] = block
+            value = block[1]
+            block[1] += 1
+        # At least six digits, so the numbers never collide with the older
+        # eight-character random suffixes
+        return f"{name}-{value:06d}"
+
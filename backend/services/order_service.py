@@ -35,10 +35,10 @@ class OrderService:
             raise ValueError("Cannot create order from empty cart")
 
         # Create order using factory method
-        order = self._create_order_from_cart(cart, user)
+        order, lines = self._create_order_from_cart(cart, user)
 
-        # Save the order
-        self.order_repository.save(order)
+        # Save the order and insert its lines in bulk
+        self.order_repository.create_with_items(order, lines)
 
         # Send SSE notification for order creation
         self._get_sse_service().send_order_created(
@@ -178,22 +178,15 @@ class OrderService:
         """Get total revenue from paid orders"""
         return self.order_repository.get_total_revenue()
 
-    def _create_order_from_cart(self, cart: Cart, user: User) -> Order:
-        """Factory method to create Order from Cart with customer/address snapshots"""
-        # Create order items from cart items
-        order_items = []
-        total_amount = 0.0
-
-        for cart_item in cart.items:
-            # Create OrderItem with price snapshot
-            order_item = OrderItem(
-                product_id=cart_item.product_id,
-                product_name=cart_item.product.name,
-                quantity=cart_item.quantity,
-                unit_price=cart_item.product.price
-            )
-            order_items.append(order_item)
-            total_amount += order_item.line_total
+    def _create_order_from_cart(self, cart: Cart, user: User):
+        """
+        Factory method to create Order from Cart with customer/address
+        snapshots. Returns (order, line rows) for create_with_items.
+        """
+        # Order line rows with price snapshots
+        lines = self.order_repository.order_lines_from_cart(cart.items)
+        total_amount = sum(
+            line['quantity'] * line['unit_price'] for line in lines)
 
         # Create order with customer/address snapshot
         order = Order(
@@ -209,10 +202,7 @@ class OrderService:
             total_amount=total_amount
         )
 
-        # Associate order items with the order
-        order.items = order_items
-
-        return order
+        return order, lines
 
     def _get_state_machine(self, order: Order):
         """Get the appropriate state machine for the order"""
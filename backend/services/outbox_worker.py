@@ -0,0 +1,184 @@
+"""
+Worker pool delivering outbox events (emails, notifications, SSE) after
+the transaction that recorded them has committed
+"""
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from database.db import db
+from models.invoice import Invoice
+from models.order import Order
+from models.receipt import Receipt
+from repositories.outbox_repository import OutboxRepository
+from services.notification_service import NotificationService
+
+MAX_RETRY_DELAY_SECONDS = 300
+
+
+def _deliver_sse(payload):
+    from services.sse_service import sse_service
+    method = payload['method']
+    if not method.startswith('send_'):
+        raise ValueError(f"Not an SSE send method: {method}")
+    getattr(sse_service, method)(*payload['args'])
+
+
+class OutboxWorker:
+    """
+    Pool of threads draining the outbox. Each thread leases a batch of due
+    events, delivers them one by one and records the outcome. A failed
+    delivery is retried with exponential backoff up to max_attempts; an
+    event held by a worker that died is picked up again once its lease
+    expires, so delivery is at least once.
+
+    Idle workers also delete delivered events past the retention period,
+    at most once per purge interval per process.
+    """
+
+    def __init__(self, outbox_repo=None, notification_service=None):
+        self.outbox_repo = outbox_repo or OutboxRepository()
+        self.notification_service = (
+            notification_service or NotificationService())
+        self.app = None
+        self.workers = 2
+        self.poll_interval = 2.0
+        self.batch_size = 50
+        self.lease_seconds = 60
+        self.max_attempts = 8
+        self.retention_days = 7
+        self.purge_interval = 3600
+        self.purge_batch_size = 1000
+        self.handlers = {
+            'order_confirmation': self._deliver_order_confirmation,
+            'invoice_notification': self._deliver_invoice_notification,
+            'receipt_email': self._deliver_receipt_email,
+            'sse': _deliver_sse,
+        }
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._purge_lock = threading.Lock()
+        self._next_purge = 0.0
+
+    def init_app(self, app):
+        """Configure from app.config; the jobs are started separately"""
+        self.app = app
+        self.workers = app.config['OUTBOX_WORKERS']
+        self.poll_interval = app.config['OUTBOX_POLL_INTERVAL']
+        self.batch_size = app.config['OUTBOX_BATCH_SIZE']
+        self.lease_seconds = app.config['OUTBOX_LEASE_SECONDS']
+        self.max_attempts = app.config['OUTBOX_MAX_ATTEMPTS']
+        self.retention_days = app.config['OUTBOX_RETENTION_DAYS']
+        self.purge_interval = app.config['OUTBOX_PURGE_INTERVAL']
+        self.purge_batch_size = app.config['OUTBOX_PURGE_BATCH_SIZE']
+
+    def register(self, event_type, handler):
+        self.handlers[event_type] = handler
+
+    def start(self):
+        if any(thread.is_alive() for thread in self._threads):
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f'outbox-worker-{n}',
+                             daemon=True)
+            for n in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        """Deliver new events now instead of at the next poll"""
+        self._wake.set()
+
+    def process_batch(self) -> int:
+        """Lease and deliver one batch; call inside an app context"""
+        events = self.outbox_repo.claim_batch(
+            self.batch_size, self.lease_seconds)
+        for event in events:
+            self._deliver(event)
+        return len(events)
+
+    def purge_delivered(self, now=None) -> int:
+        """
+        Delete events delivered more than retention_days ago, one commit
+        per batch; call inside an app context
+        """
+        before = (now or datetime.utcnow()) - timedelta(days=self.retention_days)
+        purged = 0
+        while True:
+            try:
+                deleted = self.outbox_repo.delete_delivered(
+                    before, self.purge_batch_size)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            purged += deleted
+            if deleted < self.purge_batch_size:
+                return purged
+
+    def _deliver_order_confirmation(self, payload):
+        order = db.session.get(Order, payload['order_id'])
+        invoice = db.session.get(Invoice, payload['invoice_id'])
+        self.notification_service.send_order_confirmation(order, invoice)
+
+    def _deliver_invoice_notification(self, payload):
+        invoice = db.session.get(Invoice, payload['invoice_id'])
+        self.notification_service.send_invoice_notification(invoice)
+
+    def _deliver_receipt_email(self, payload):
+        receipt = db.session.get(Receipt, payload['receipt_id'])
+        self.notification_service.send_receipt_email(receipt, receipt.order)
+
+    def _deliver(self, event):
+        handler = self.handlers.get(event.event_type)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for {event.event_type}")
+            handler(event.get_payload())
+        except Exception as e:
+            db.session.rollback()
+            error = f"{e.__class__.__name__}: {e}"
+            retry_at = None
+            if event.attempts < self.max_attempts:
+                delay = min(2 ** event.attempts, MAX_RETRY_DELAY_SECONDS)
+                retry_at = datetime.utcnow() + timedelta(seconds=delay)
+            else:
+                print(f"Outbox event {event.id} failed permanently: {error}")
+            self.outbox_repo.mark_failed(event, error, retry_at)
+            return
+        self.outbox_repo.mark_delivered(event)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    delivered = self.process_batch()
+            except Exception:
+                print(f"Outbox worker error: {traceback.format_exc()}")
+                delivered = 0
+            if not delivered:
+                self._purge_if_due()
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _purge_if_due(self):
+        with self._purge_lock:
+            if time.monotonic() < self._next_purge:
+                return
+            self._next_purge = time.monotonic() + self.purge_interval
+        try:
+            with self.app.app_context():
+                purged = self.purge_delivered()
+            if purged:
+                print(f"Outbox purged {purged} delivered events")
+        except Exception as e:
+            print(f"Outbox purge failed: {e}")
+
@@ -0,0 +1,54 @@
+"""
+Bounded execution of payment gateway calls off the request's database
+transaction
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from threading import BoundedSemaphore
+
+from exceptions.payment_exceptions import (
+    PaymentGatewayBusyError, PaymentTimeoutError)
+
+
+class PaymentExecutor:
+    """
+    Runs gateway calls on a dedicated thread pool.
+
+    At most max_in_flight calls are admitted at once; a caller waits for a
+    slot for at most the call timeout. A call that times out keeps its slot
+    until the gateway actually returns, so a hanging gateway cannot pile up
+    unbounded work behind it.
+
+    PaymentGatewayBusyError means fn was never called; PaymentTimeoutError
+    means it was and may still complete, so its outcome is unknown.
+    """
+
+    def __init__(self, max_workers=32, max_in_flight=64, timeout_seconds=10.0):
+        self.timeout_seconds = timeout_seconds
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='payment-gateway')
+        self._slots = BoundedSemaphore(max_in_flight)
+
+    def run(self, fn, *args, timeout=None):
+        """Call fn(*args) on the pool and return its result"""
+        timeout = timeout or self.timeout_seconds
+        deadline = time.monotonic() + timeout
+
+        if not self._slots.acquire(timeout=timeout):
+            raise PaymentGatewayBusyError()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            if future.cancel():
+                # Still queued for a worker thread: fn never ran
+                raise PaymentGatewayBusyError()
+            raise PaymentTimeoutError(timeout)
+
@@ -0,0 +1,94 @@
+"""
+Background job settling payments whose gateway call timed out or whose
+checkout died before recording the outcome
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+from database.db import db
+from repositories.payment_repository import PaymentRepository
+
+
+class PaymentReconciler:
+    """
+    Periodically asks the gateway about payments still pending well after
+    their call timed out and lets the checkout service finish them: paid,
+    declined, or cancelled if the gateway never saw them. A payment whose
+    outcome is still unknown is retried on the next run. Safe to run in
+    several processes at once: each payment is settled under its row lock.
+    """
+
+    def __init__(self, checkout_service, payment_repo=None):
+        self.checkout_service = checkout_service
+        self.payment_repo = payment_repo or PaymentRepository()
+        self.app = None
+        self.interval_seconds = 30
+        self.batch_size = 100
+        # Leave payments alone while their own request may still settle them
+        self.min_age_seconds = 20.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        """Configure from app.config; the jobs are started separately"""
+        self.app = app
+        self.interval_seconds = app.config['PAYMENT_RECONCILE_INTERVAL']
+        self.batch_size = app.config['PAYMENT_RECONCILE_BATCH_SIZE']
+        self.min_age_seconds = 2 * app.config['PAYMENT_TIMEOUT_SECONDS']
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='payment-reconciler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def reconcile(self, now=None) -> dict:
+        """
+        Settle one batch of overdue pending payments; call inside an app
+        context
+        """
+        now = now or datetime.utcnow()
+        started = time.monotonic()
+        payment_ids = self.payment_repo.find_pending_ids(
+            now - timedelta(seconds=self.min_age_seconds), self.batch_size)
+        db.session.commit()  # end the read before calling the gateway
+
+        settled = unknown = failed = 0
+        for payment_id in payment_ids:
+            try:
+                result = self.checkout_service.reconcile_payment(payment_id)
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error(
+                    "Could not reconcile payment %s: %s", payment_id, e)
+                failed += 1
+                continue
+            if result is None or result.get('pending'):
+                unknown += 1
+            else:
+                settled += 1
+
+        return {
+            'settled': settled,
+            'unknown': unknown,
+            'failed': failed,
+            'seconds': round(time.monotonic() - started, 3)
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                with self.app.app_context():
+                    result = self.reconcile()
+                if result['settled'] or result['failed']:
+                    print(f"Payment reconciler settled {result['settled']} "
+                          f"payments, {result['unknown']} still unknown, "
+                          f"{result['failed']} failed")
+            except Exception as e:
+                print(f"Payment reconciler failed: {e}")
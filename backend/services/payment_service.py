@@ -1,14 +1,76 @@
 from datetime import datetime
-from domain.payment_strategy import MockPaymentStrategy
+from domain.payment_strategy import (
+    MockPaymentStrategy, PaymentResult, PaymentStatus)
+from exceptions.payment_exceptions import (
+    PaymentGatewayBusyError, PaymentTimeoutError)
 from models.payment import Payment
-from database.db import db
+from database.db import db, in_unit_of_work, save_changes
+from services.payment_executor import PaymentExecutor
 
 
 class PaymentProcessor:
-    def __init__(self, payment_strategy=None):
+    def __init__(self, payment_strategy=None, executor=None):
         self.payment_strategy = payment_strategy or MockPaymentStrategy()
+        self.executor = executor or PaymentExecutor()
 
     def process_payment(self, amount, payment_details, idempotency_key):
+        """
+        Authorize and capture on the payment executor, bounded by its
+        concurrency limit and per-call timeout. Never touches the database.
+
+        Besides the gateway's own results this returns CANCELLED when the
+        gateway was never called (no slot or worker freed up in time) and
+        PENDING when the call timed out: it may still authorize, so the
+        outcome has to be reconciled with lookup().
+        """
+        try:
+            return self.executor.run(
+                self._authorize_and_capture,
+                amount, payment_details, idempotency_key)
+        except PaymentGatewayBusyError as e:
+            return self._result(PaymentStatus.CANCELLED, str(e), amount)
+        except PaymentTimeoutError as e:
+            return self._result(
+                PaymentStatus.PENDING, f"Payment outcome unknown: {e}", amount)
+
+    def lookup(self, idempotency_key):
+        """
+        Outcome of an earlier process_payment call: its result (captured if
+        it was only authorized), PENDING while still unknown, or None if the
+        gateway never received it
+        """
+        try:
+            return self.executor.run(self._lookup_and_capture, idempotency_key)
+        except (PaymentGatewayBusyError, PaymentTimeoutError) as e:
+            return self._result(
+                PaymentStatus.PENDING, f"Payment outcome unknown: {e}", 0.0)
+
+    def refund(self, transaction_id, amount):
+        """Refund a captured payment; a failed call returns success=False"""
+        try:
+            return self.executor.run(
+                self.payment_strategy.refund, transaction_id, amount)
+        except (PaymentGatewayBusyError, PaymentTimeoutError) as e:
+            return self._result(PaymentStatus.PENDING, str(e), amount)
+
+    def _lookup_and_capture(self, idempotency_key):
+        result = self.payment_strategy.lookup(idempotency_key)
+        if result is not None and result.status == PaymentStatus.AUTHORIZED:
+            # The timed-out call may have died between the two steps
+            return self.payment_strategy.capture(result.transaction_id)
+        return result
+
+    def _result(self, status, message, amount):
+        return PaymentResult(
+            success=False,
+            transaction_id="",
+            status=status,
+            message=message,
+            amount=amount,
+            timestamp=datetime.utcnow()
+        )
+
+    def _authorize_and_capture(self, amount, payment_details, idempotency_key):
         # Authorize payment
         auth_result = self.payment_strategy.authorize(
             amount, payment_details, idempotency_key)
@@ -23,19 +85,49 @@ class PaymentProcessor:
 
 
 class PaymentService:
-    def __init__(self):
-        self.payment_processor = PaymentProcessor()
+    def __init__(self, payment_processor=None):
+        self.payment_processor = payment_processor or PaymentProcessor()
 
-    def create_payment(self, order_id, amount, payment_method):
+    def create_payment(self, order_id, amount, payment_method,
+                       idempotency_key=None):
+        """idempotency_key is the gateway key, kept to reconcile the payment"""
         payment = Payment(
             order_id=order_id,
             amount=amount,
-            payment_method=payment_method
+            payment_method=payment_method,
+            idempotency_key=idempotency_key
         )
         db.session.add(payment)
-        db.session.commit()
+        save_changes()
         return payment
 
+    def authorize(self, amount, payment_details, idempotency_key):
+        """Call the gateway; hold no database transaction while this runs"""
+        return self.payment_processor.process_payment(
+            amount, payment_details, idempotency_key)
+
+    def lookup(self, idempotency_key):
+        """Ask the gateway for the outcome of an earlier authorize()"""
+        return self.payment_processor.lookup(idempotency_key)
+
+    def refund(self, transaction_id, amount):
+        return self.payment_processor.refund(transaction_id, amount)
+
+    def record_result(self, payment, payment_result):
+        """Store the gateway outcome on the payment record"""
+        payment.status = payment_result.status.value
+        payment.transaction_id = payment_result.transaction_id
+        if not payment_result.success:
+            payment.error_message = payment_result.message
+        payment.updated_at = datetime.utcnow()
+        save_changes()
+
+        return {
+            'success': payment_result.success,
+            'payment': payment,
+            'message': payment_result.message
+        }
+
     def process_order_payment(
             self, order, payment_details, idempotency_key=None):
         try:
@@ -46,26 +138,19 @@ class PaymentService:
             if not idempotency_key:
                 idempotency_key = f"order_{order.id}_{order.created_at.strftime('%Y%m%d%H%M%S')}"
 
-            payment_result = self.payment_processor.process_payment(
+            payment_result = self.authorize(
                 order.total_amount,
                 payment_details,
                 idempotency_key
             )
 
             # Update payment status
-            payment.status = payment_result.status.value
-            payment.transaction_id = payment_result.transaction_id
-            payment.updated_at = datetime.utcnow()
-
-            db.session.commit()
-
-            return {
-                'success': payment_result.success,
-                'payment': payment,
-                'message': payment_result.message
-            }
+            return self.record_result(payment, payment_result)
 
         except Exception as e:
+            if in_unit_of_work():
+                # Let the unit of work roll back the whole checkout
+                raise
             db.session.rollback()
             return {
                 'success': False,
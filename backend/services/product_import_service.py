@@ -0,0 +1,201 @@
+import csv
+import json
+import math
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from database.db import db
+from models.product import Product
+from repositories.cart_repository import CartRepository
+from services.catalog_cache import CatalogCache
+from services.search_index import ProductSearchIndex
+
+SUPPORTED_FORMATS = ('csv', 'ndjson')
+MAX_REPORTED_ERRORS = 1000
+MAX_STOCK = 2 ** 31 - 1  # products.stock is a 32-bit INTEGER
+
+
+class ProductImportService:
+    """
+    Streams a CSV or NDJSON product feed into the catalog.
+
+    Rows are validated one at a time and upserted in batches (one
+    statement and one commit per batch), so memory use does not grow with
+    the size of the feed. Invalid rows are reported and skipped; they do
+    not abort the rest of their batch.
+    """
+
+    def __init__(self, product_repo, batch_size=1000, cart_repo=None,
+                 catalog_cache=None, search_index=None):
+        self.product_repo = product_repo
+        self.cart_repo = cart_repo or CartRepository()
+        self.catalog_cache = catalog_cache or CatalogCache()
+        self.search_index = search_index or ProductSearchIndex()
+        self.batch_size = batch_size
+
+    def import_stream(self, stream, fmt, batch_size=None):
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(
+                f"Unsupported format: {fmt}. Use csv or ndjson")
+        batch_size = max(1, batch_size or self.batch_size)
+
+        result = {'processed': 0, 'imported': 0, 'failed': 0, 'errors': []}
+        # sku (or row number) -> (row numbers, row); a later row with the
+        # same sku replaces the earlier one within a batch
+        batch = {}
+
+        try:
+            for row_number, raw in self._read_rows(stream, fmt):
+                result['processed'] += 1
+                try:
+                    row = self._validate(raw)
+                except ValueError as e:
+                    self._record_error(result, row_number, str(e))
+                    continue
+
+                key = row['sku'] or f'#{row_number}'
+                row_numbers = batch[key][0] if key in batch else []
+                batch[key] = (row_numbers + [row_number], row)
+                if len(batch) >= batch_size:
+                    self._flush(batch, result)
+                    batch = {}
+
+            if batch:
+                self._flush(batch, result)
+        finally:
+            # Earlier batches are committed even if a later one raises
+            if result['imported']:
+                self.catalog_cache.bump()
+                self.search_index.invalidate()
+        return result
+
+    def _read_rows(self, stream, fmt):
+        """
+        Yield (row_number, dict) pairs; unreadable rows yield errors.
+        Lines are decoded one at a time, so invalid UTF-8 only costs its own
+        line of NDJSON; in CSV it ends the feed, since the line may belong
+        to a quoted field.
+        """
+        if fmt == 'csv':
+            lines = (self._decode(line) for line in stream)
+            reader = csv.DictReader(lines)
+            row_number = 1  # Row 1 is the header
+            while True:
+                row_number += 1
+                try:
+                    raw = next(reader)
+                except StopIteration:
+                    return
+                except csv.Error as e:
+                    raw = ValueError(f"Invalid CSV: {e}")
+                except UnicodeDecodeError:
+                    yield row_number, ValueError(
+                        "Invalid UTF-8; the rest of the feed was skipped")
+                    return
+                yield row_number, raw
+
+        for row_number, line in enumerate(stream, start=1):
+            try:
+                line = self._decode(line).strip()
+            except UnicodeDecodeError:
+                yield row_number, ValueError("Invalid UTF-8")
+                continue
+            if not line:
+                continue
+            try:
+                raw = json.loads(line)
+            except json.JSONDecodeError as e:
+                raw = ValueError(f"Invalid JSON: {e.msg}")
+            yield row_number, raw
+
+    def _decode(self, line):
+        # UTF-8 never splits a character across a newline; utf-8-sig drops
+        # a byte order mark
+        return line.decode('utf-8-sig')
+
+    def _validate(self, raw):
+        if isinstance(raw, Exception):
+            raise raw
+        if not isinstance(raw, dict):
+            raise ValueError("Row must be an object")
+        if any(isinstance(value, str) and '\x00' in value
+               for value in raw.values()):
+            # Postgres text columns cannot store NUL
+            raise ValueError("Row contains a NUL character")
+
+        name = str(raw.get('name') or '').strip()
+        if not name:
+            raise ValueError("name is required")
+        if len(name) > 100:
+            raise ValueError("name must be at most 100 characters")
+
+        try:
+            price = float(raw.get('price'))
+        except (TypeError, ValueError):
+            raise ValueError("price must be a number")
+        if not math.isfinite(price) or price < 0:
+            raise ValueError("price must be a non-negative number")
+
+        try:
+            stock = int(raw.get('stock'))
+        except (TypeError, ValueError):
+            raise ValueError("stock must be an integer")
+        if stock < 0:
+            raise ValueError("stock must not be negative")
+        if stock > MAX_STOCK:
+            raise ValueError(f"stock must be at most {MAX_STOCK}")
+
+        sku = (str(raw.get('sku') or '')).strip() or None
+        if sku and len(sku) > 64:
+            raise ValueError("sku must be at most 64 characters")
+
+        category = str(raw.get('category') or '').strip() or 'general'
+        if len(category) > 50:
+            raise ValueError("category must be at most 50 characters")
+
+        description = str(raw.get('description') or '') or None
+        if description and len(description) > 255:
+            raise ValueError("description must be at most 255 characters")
+
+        image_path = str(raw.get('image_path') or '') or None
+        if image_path and len(image_path) > 255:
+            raise ValueError("image_path must be at most 255 characters")
+
+        is_active = raw.get('is_active', True)
+        if isinstance(is_active, str):
+            is_active = is_active.strip().lower() not in ('false', '0', 'no')
+
+        return {
+            'sku': sku,
+            'name': name,
+            'description': description,
+            'price': price,
+            'stock': stock,
+            'category': category,
+            'image_path': image_path,
+            'is_active': bool(is_active),
+        }
+
+    def _flush(self, batch, result):
+        entries = list(batch.values())
+        try:
+            rows = [row for _, row in entries]
+            self.product_repo.upsert_many(rows)
+            skus = [row['sku'] for row in rows if row['sku']]
+            if skus:
+                # Existing products may have changed price
+                self.cart_repo.reprice_carts(
+                    db.select(Product.id).where(Product.sku.in_(skus)))
+            db.session.commit()
+            result['imported'] += sum(len(numbers) for numbers, _ in entries)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            message = f"Batch failed: {e.__class__.__name__}"
+            for row_numbers, _ in entries:
+                for row_number in row_numbers:
+                    self._record_error(result, row_number, message)
+
+    def _record_error(self, result, row_number, message):
+        result['failed'] += 1
+        if len(result['errors']) < MAX_REPORTED_ERRORS:
+            result['errors'].append({'row': row_number, 'error': message})
@@ -1,12 +1,22 @@
 from typing import List
 from models.product import Product
+from repositories.cart_repository import CartRepository
 from utils.image_handler import save_image, delete_image
 from services.notification_service import Observer
+from services.catalog_cache import CatalogCache, ProductFragmentCache
+from services.search_index import ProductSearchIndex
+from database.db import db
+from utils.pagination import clamp_limit
 
 
 class ProductService:
-    def __init__(self, product_repo):
+    def __init__(self, product_repo, cart_repo=None, catalog_cache=None,
+                 fragment_cache=None, search_index=None):
         self.product_repo = product_repo
+        self.cart_repo = cart_repo or CartRepository()
+        self.catalog_cache = catalog_cache or CatalogCache()
+        self.fragment_cache = fragment_cache or ProductFragmentCache()
+        self.search_index = search_index or ProductSearchIndex()
         self._observers: List[Observer] = []
 
     def attach(self, observer: Observer) -> None:
@@ -28,6 +38,31 @@ class ProductService:
         for observer in self._observers:
             observer.update(message)
 
+    def _product_changed(self, product: Product) -> None:
+        """
+        Refresh derived catalog state (response cache, serialized
+        fragment, search index) after a product mutation
+        """
+        self.catalog_cache.bump()
+        self.fragment_cache.invalidate(product.id)
+        self.search_index.index_product(product)
+
+    def _product_removed(self, product_id) -> None:
+        self.catalog_cache.bump()
+        self.fragment_cache.invalidate(product_id)
+        self.search_index.remove_product(product_id)
+
+    def _release_image(self, image_path, product_id) -> None:
+        """
+        Delete an image file once no other product references it (images
+        are content-addressed, so identical uploads share a file)
+        """
+        if not image_path:
+            return
+        if self.product_repo.count_image_references(
+                image_path, exclude_product_id=product_id) == 0:
+            delete_image(image_path)
+
     def check_low_stock(self, product: Product) -> None:
         """
         Check if product stock is below threshold and notify if necessary
@@ -36,22 +71,114 @@ class ProductService:
             self.notify(
                 f"Low stock alert: {product.name} has only {product.stock} units remaining!")
 
+    def check_low_stock_bulk(self, stock_levels) -> None:
+        """
+        Check a set of stock levels (dicts with name, stock and
+        low_stock_threshold) once and send a single combined alert
+        """
+        low = [level for level in stock_levels
+               if level['stock'] <= level['low_stock_threshold']]
+        if low:
+            details = ', '.join(
+                f"{level['name']} ({level['stock']} left)" for level in low)
+            self.notify(f"Low stock alert for {len(low)} products: {details}")
+
+    def bulk_adjust_stock(self, adjustments):
+        """
+        Apply a list of stock adjustments in one transaction. Each entry is
+        {'product_id': id, 'delta': n} or {'product_id': id, 'stock': n}.
+        Returns the resulting stock levels.
+        """
+        if not isinstance(adjustments, list) or not adjustments:
+            raise ValueError("adjustments must be a non-empty list")
+
+        deltas, absolutes = {}, {}
+        for entry in adjustments:
+            if not isinstance(entry, dict) or 'product_id' not in entry:
+                raise ValueError("Each adjustment needs a product_id")
+            try:
+                product_id = int(entry['product_id'])
+            except (TypeError, ValueError):
+                raise ValueError(
+                    f"Invalid product_id: {entry['product_id']!r}")
+            # After int(), so "1" and 1 count as the same product
+            if product_id in deltas or product_id in absolutes:
+                raise ValueError(f"Duplicate adjustment for product {product_id}")
+            if ('delta' in entry) == ('stock' in entry):
+                raise ValueError(
+                    f"Adjustment for product {product_id} needs exactly one "
+                    f"of delta or stock")
+            try:
+                if 'delta' in entry:
+                    deltas[product_id] = int(entry['delta'])
+                else:
+                    absolutes[product_id] = int(entry['stock'])
+            except (TypeError, ValueError):
+                raise ValueError(
+                    f"Invalid adjustment for product {product_id}")
+
+        stock_levels = self.product_repo.apply_stock_changes(deltas, absolutes)
+        self.catalog_cache.bump()
+        self.check_low_stock_bulk(stock_levels)
+        return stock_levels
+
     def get_all_categories(self):
         """
         Get all unique categories from active products
         """
-        products = self.product_repo.get_all()
-        categories = list(set(p.category for p in products if p.is_active))
-        return categories
+        return [row['category']
+                for row in self.product_repo.get_category_stats()]
+
+    def get_category_summaries(self):
+        """
+        Get each active category with its product count and price range
+        """
+        return self.product_repo.get_category_stats()
 
     def get_all_products(self, category=None, include_inactive=False):
-        products = self.product_repo.get_all()
-        # Filter active products (unless include_inactive is True)
-        if not include_inactive:
-            products = [p for p in products if p.is_active]
-        if category:
-            products = [p for p in products if p.category == category]
-        return products
+        return self.product_repo.find(
+            category=category,
+            is_active=None if include_inactive else True)
+
+    def get_product_page(self, category=None, include_inactive=False,
+                         min_price=None, max_price=None, sort='id',
+                         after=None, limit=None):
+        """
+        Get one keyset-paginated page of products.
+        Returns (products, next_cursor_values); the cursor is None on the last page.
+        """
+        limit = clamp_limit(limit)
+        # Fetch one extra row to know whether another page exists
+        products = self.product_repo.find(
+            category=category,
+            is_active=None if include_inactive else True,
+            min_price=min_price,
+            max_price=max_price,
+            sort=sort,
+            after=after,
+            limit=limit + 1)
+
+        next_cursor = None
+        if len(products) > limit:
+            products = products[:limit]
+            next_cursor = self.product_repo.cursor_values(products[-1], sort)
+        return products, next_cursor
+
+    def search_products(self, query, limit=None, offset=0):
+        """
+        Ranked product search by name and description.
+        Uses the Postgres GIN full-text index when available, otherwise the
+        in-memory inverted index. Returns (products, total_matches).
+        """
+        limit = clamp_limit(limit)
+        offset = max(0, offset or 0)
+        if db.engine.dialect.name == 'postgresql':
+            return self.product_repo.search_fulltext(query, limit, offset)
+
+        product_ids, total = self.search_index.search(query, limit, offset)
+        # The index may lag behind deactivations made by other processes
+        products = self.product_repo.get_by_ids(product_ids, active_only=True)
+        return products, total - (len(product_ids) - len(products))
 
     def get_product(self, product_id):
         product = self.product_repo.get_by_id(product_id)
@@ -71,7 +198,9 @@ class ProductService:
             image_path=image_path
         )
         product.category = category
-        return self.product_repo.create(product)
+        product = self.product_repo.create(product)
+        self._product_changed(product)
+        return product
 
     def update_product(self, product_id, data, image=None):
         product = self.product_repo.get_by_id(product_id)
@@ -79,31 +208,38 @@ class ProductService:
             return None
 
         if image:
-            # Delete old image if it exists
-            delete_image(product.image_path)
-            # Save new image
+            old_image_path = product.image_path
+            # Save new image, then drop the old one unless it is identical
             product.image_path = save_image(image)
+            if old_image_path != product.image_path:
+                self._release_image(old_image_path, product.id)
 
         if 'name' in data:
             product.name = data['name']
         if 'description' in data:
             product.description = data['description']
-        if 'price' in data:
+        if 'price' in data and data['price'] != product.price:
             product.price = data['price']
+            # Same transaction as the price change
+            self.cart_repo.reprice_carts([product.id])
         if 'stock' in data:
             product.stock = data['stock']
             self.check_low_stock(product)
         if 'category' in data:
             product.category = data['category']
 
-        return self.product_repo.update(product)
+        product = self.product_repo.update(product)
+        self._product_changed(product)
+        return product
 
     def delete_product(self, product_id):
         product = self.product_repo.get_by_id(product_id)
         if product:
             # Instead of deleting, mark as inactive
             product.is_active = False
-            return self.product_repo.update(product)
+            product = self.product_repo.update(product)
+            self._product_changed(product)
+            return product
         return None
 
     def activate_product(self, product_id):
@@ -113,7 +249,9 @@ class ProductService:
             raise ValueError("Product not found")
 
         product.is_active = True
-        return self.product_repo.update(product)
+        product = self.product_repo.update(product)
+        self._product_changed(product)
+        return product
 
     def deactivate_product(self, product_id):
         """Deactivate a product (soft delete)"""
@@ -122,7 +260,9 @@ class ProductService:
             raise ValueError("Product not found")
 
         product.is_active = False
-        return self.product_repo.update(product)
+        product = self.product_repo.update(product)
+        self._product_changed(product)
+        return product
 
     def permanently_delete_product(self, product_id):
         """Permanently delete a product from the database"""
@@ -130,9 +270,11 @@ class ProductService:
         if not product:
             raise ValueError("Product not found")
 
-        # Delete the image file if it exists
+        # Delete the image file if no other product uses it
         if product.image_path:
-            delete_image(product.image_path)
+            self._release_image(product.image_path, product.id)
 
         # Permanently delete from database
-        return self.product_repo.delete(product_id)
+        deleted = self.product_repo.delete(product_id)
+        self._product_removed(product_id)
+        return deleted
@@ -1,19 +1,24 @@
-import uuid
-from datetime import datetime
 from models.receipt import Receipt
-from database.db import db
+from database.db import db, save_changes
+from services.number_allocator import NumberAllocator
+
+RECEIPT_PREFIX = 'RCP'
 
 
 class ReceiptService:
-    def __init__(self, notification_service=None):
+    def __init__(self, notification_service=None, number_allocator=None):
         self.notification_service = notification_service
+        self.number_allocator = number_allocator or NumberAllocator()
 
-    def generate_receipt(self, payment, order) -> Receipt:
+    def generate_receipt(self, payment, order, notify=True,
+                         receipt_number=None) -> Receipt:
         """
         Generate receipt for completed payment.
-        Called after payment is successfully captured.
+        Called after payment is successfully captured. Pass notify=False
+        when the caller sends the receipt email itself, and receipt_number
+        when it was allocated ahead of the transaction.
         """
-        receipt_number = self._generate_receipt_number()
+        receipt_number = receipt_number or self.next_receipt_number()
 
         receipt = Receipt(
             order_id=order.id,
@@ -27,10 +32,10 @@ class ReceiptService:
         )
 
         db.session.add(receipt)
-        db.session.commit()
+        save_changes()
 
         # Notify customer via email
-        if self.notification_service:
+        if notify and self.notification_service:
             self.notification_service.send_receipt_email(receipt, order)
 
         return receipt
@@ -62,8 +67,6 @@ class ReceiptService:
             return True
         return False
 
-    def _generate_receipt_number(self) -> str:
-        """Generate unique receipt number"""
-        timestamp = datetime.utcnow().strftime('%Y%m%d')
-        unique_id = str(uuid.uuid4())[:8].upper()
-        return f"RCP-{timestamp}-{unique_id}"
+    def next_receipt_number(self) -> str:
+        """Allocate the next receipt number, e.g. RCP-20261017-000042"""
+        return self.number_allocator.next_number(RECEIPT_PREFIX)
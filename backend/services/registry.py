@@ -0,0 +1,21 @@
+"""
+Lookup of the current app's shared services, importable from anywhere
+(including models) without pulling in the service modules themselves
+"""
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+EXTENSION_KEY = 'services'
+
+
+def current_services():
+    """The ServiceContainer of the current app"""
+    return current_app.extensions[EXTENSION_KEY]
+
+
+def get_service(name):
+    """
+    Proxy to the named service of the current app's container, for use as
+    a module-level name in blueprints
+    """
+    return LocalProxy(lambda: getattr(current_services(), name))
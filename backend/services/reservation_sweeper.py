@@ -0,0 +1,89 @@
+"""
+Background job releasing inventory holds whose checkout never completed
+"""
+import threading
+import time
+from datetime import datetime
+
+from database.db import db
+from repositories.product_repository import ProductRepository
+from repositories.reservation_repository import ReservationRepository
+
+
+class ReservationSweeper:
+    """
+    Periodically expires overdue reservations in batches: each batch marks
+    the holds expired, puts their stock back, cancels orders still waiting
+    in 'placed' and commits. Safe to run in several processes at once.
+    """
+
+    def __init__(self, reservation_repo=None, product_repo=None):
+        self.reservation_repo = reservation_repo or ReservationRepository()
+        self.product_repo = product_repo or ProductRepository()
+        self.app = None
+        self.interval_seconds = 60
+        self.batch_size = 500
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        """Configure from app.config; the jobs are started separately"""
+        self.app = app
+        self.interval_seconds = app.config['RESERVATION_SWEEP_INTERVAL']
+        self.batch_size = app.config['RESERVATION_SWEEP_BATCH_SIZE']
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='reservation-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def sweep(self, now=None) -> dict:
+        """Release every overdue hold; call inside an app context"""
+        now = now or datetime.utcnow()
+        started = time.monotonic()
+        released = 0
+        cancelled = 0
+        while True:
+            try:
+                holds = self.reservation_repo.expire_batch(now, self.batch_size)
+                if not holds:
+                    break
+                quantities = {}
+                for hold in holds:
+                    quantities[hold['product_id']] = (
+                        quantities.get(hold['product_id'], 0) + hold['quantity'])
+                self.product_repo.restore_stock(quantities)
+                cancelled += self.reservation_repo.cancel_placed_orders(
+                    sorted({hold['order_id'] for hold in holds
+                            if hold['order_id'] is not None}))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            released += len(holds)
+            if len(holds) < self.batch_size:
+                break
+
+        return {
+            'released': released,
+            'orders_cancelled': cancelled,
+            'seconds': round(time.monotonic() - started, 3)
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                with self.app.app_context():
+                    result = self.sweep()
+                if result['released']:
+                    print(f"Reservation sweeper released {result['released']} "
+                          f"holds, cancelled {result['orders_cancelled']} orders")
+            except Exception as e:
+                print(f"Reservation sweeper failed: {e}")
+
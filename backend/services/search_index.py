@@ -0,0 +1,207 @@
+"""
+In-memory inverted index for product search on databases without
+full-text search support (SQLite in development)
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from flask import current_app
+
+TOKEN_PATTERN = re.compile(r'\w+')
+NAME_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+PREFIX_PENALTY = 0.5  # prefix matches rank below exact term matches
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class ProductSearchIndex:
+    """
+    Maps terms to the active products containing them.
+
+    Built from the products table on first search and then kept up to
+    date incrementally by this process's ProductService mutations.
+    Changes made by other processes are picked up by rebuilding the index
+    in a background thread once it is older than ttl_seconds (or has been
+    invalidated); searches keep using the old index until the new one is
+    swapped in. Query terms must all match; the last term also matches as
+    a prefix so the index can back autocomplete.
+    """
+
+    def __init__(self, ttl_seconds=60):
+        self.ttl_seconds = ttl_seconds
+        self._postings = {}  # term -> {product_id: weight}
+        self._terms = []  # sorted vocabulary for prefix lookups
+        self._documents = {}  # product_id -> set of terms
+        self._built = False
+        self._built_at = 0.0
+        self._stale = False
+        # Set while a rebuild runs: product_id -> (name, description), or
+        # None if removed, for products changed meanwhile, replayed onto the new index before the swap
+        self._changes = None
+        self._lock = threading.Lock()
+
+    def search(self, query, limit=20, offset=0):
+        """Return (product_ids, total_matches) ordered by relevance"""
+        terms = tokenize(query)
+        if not terms:
+            return [], 0
+
+        self._ensure_built()
+        with self._lock:
+            matches = [self._match(term, prefix=position == len(terms) - 1)
+                       for position, term in enumerate(terms)]
+
+        # Intersect starting from the rarest term to keep the working set small
+        matches.sort(key=len)
+        scores = matches[0]
+        for term_scores in matches[1:]:
+            scores = {pid: score + term_scores[pid]
+                      for pid, score in scores.items()
+                      if pid in term_scores}
+        if not scores:
+            return [], 0
+
+        # Highest score first, lowest id breaks ties
+        ranked = heapq.nsmallest(
+            offset + limit, scores.items(),
+            key=lambda item: (-item[1], item[0]))
+        return [pid for pid, _ in ranked[offset:]], len(scores)
+
+    def index_product(self, product):
+        """Add or refresh a product; inactive products are removed"""
+        if not self._built:
+            return  # picked up by the initial build
+        document = ((product.name, product.description)
+                    if product.is_active else None)
+        with self._lock:
+            self._apply(product.id, document)
+
+    def remove_product(self, product_id):
+        if not self._built:
+            return
+        with self._lock:
+            self._apply(product_id, None)
+
+    def invalidate(self):
+        """Rebuild on the next search (e.g. after imports)"""
+        self._stale = True
+
+    def _ensure_built(self):
+        if not self._built:
+            # Nothing to serve yet: build on this thread
+            with self._lock:
+                if not self._built:
+                    self._swap(self._build(), time.monotonic())
+            return
+        if self._stale or self._expired():
+            self._start_rebuild()
+
+    def _start_rebuild(self):
+        with self._lock:
+            if self._changes is not None:
+                return  # already rebuilding
+            self._changes = {}
+            self._stale = False
+        threading.Thread(
+            target=self._rebuild, args=(current_app._get_current_object(),),
+            name='search-index-rebuild', daemon=True).start()
+
+    def _rebuild(self, app):
+        started = time.monotonic()
+        try:
+            with app.app_context():
+                index = self._build()
+        except Exception as e:
+            with self._lock:
+                self._changes = None
+            print(f"Search index rebuild failed: {e}")
+            return
+        with self._lock:
+            for product_id, document in self._changes.items():
+                index._apply(product_id, document)
+            self._changes = None
+            self._swap(index, started)
+
+    def _build(self):
+        """A new, fully built index of the active products"""
+        from models.product import Product
+
+        rows = Product.query.with_entities(
+            Product.id, Product.name, Product.description
+        ).filter(Product.is_active.is_(True)).all()
+
+        index = ProductSearchIndex(self.ttl_seconds)
+        for product_id, name, description in rows:
+            index._add(product_id, name, description)
+        index._terms = sorted(index._postings)
+        index._built = True
+        return index
+
+    def _swap(self, index, started):
+        self._postings = index._postings
+        self._terms = index._terms
+        self._documents = index._documents
+        self._built = True
+        self._built_at = started
+
+    def _apply(self, product_id, document):
+        """Re-index a product from (name, description); None removes it"""
+        if self._changes is not None:
+            self._changes[product_id] = document
+        self._remove(product_id)
+        if document is not None:
+            self._add(product_id, *document)
+
+    def _expired(self):
+        return time.monotonic() - self._built_at >= self.ttl_seconds
+
+    def _match(self, term, prefix):
+        if not prefix:
+            # Copy so callers can use the result outside the lock
+            return dict(self._postings.get(term, {}))
+
+        matches = {}
+        for index in range(bisect_left(self._terms, term), len(self._terms)):
+            candidate = self._terms[index]
+            if not candidate.startswith(term):
+                break
+            factor = 1.0 if candidate == term else PREFIX_PENALTY
+            for pid, weight in self._postings[candidate].items():
+                # Count each product once, using its best matching term
+                matches[pid] = max(matches.get(pid, 0.0), weight * factor)
+        return matches
+
+    def _add(self, product_id, name, description):
+        weights = {}
+        for term in tokenize(name):
+            weights[term] = weights.get(term, 0.0) + NAME_WEIGHT
+        for term in tokenize(description):
+            weights[term] = weights.get(term, 0.0) + DESCRIPTION_WEIGHT
+
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                if self._built:
+                    insort(self._terms, term)
+            postings[product_id] = weight
+        self._documents[product_id] = set(weights)
+
+    def _remove(self, product_id):
+        for term in self._documents.pop(product_id, ()):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+                index = bisect_left(self._terms, term)
+                if index < len(self._terms) and self._terms[index] == term:
+                    del self._terms[index]
+
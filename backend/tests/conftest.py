@@ -0,0 +1,48 @@
+import os
+
+# main builds its module-level app from the environment on import
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+import pytest
+
+from config import Config
+from database.db import db
+from main import create_app
+from models.user import User
+from utils.jwt_handler import JWTHandler
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    BACKGROUND_JOBS_IN_WEB = False
+    PAYMENT_GATEWAY_LATENCY = 0.0
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def customer(app):
+    user = User('Customer', 'customer@example.com', 'password')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(customer):
+    token = JWTHandler.create_access_token({'user_id': customer.id})
+    return {'Authorization': f'Bearer {token}'}
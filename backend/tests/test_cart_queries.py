@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy import event
+
+from database.db import db
+from models.product import Product
+
+
+def count_statements(fn):
+    """Run fn and return how many SQL statements it executed"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return len(statements)
+
+
+@pytest.mark.parametrize('lines', [1, 30])
+def test_get_cart_query_count_does_not_grow_with_lines(
+        app, client, auth_headers, lines):
+    products = [Product(f'Product {n}', 'desc', 1.5, 100)
+                for n in range(lines)]
+    db.session.add_all(products)
+    db.session.commit()
+    for product in products:
+        response = client.post('/api/cart/add', headers=auth_headers,
+                               json={'product_id': product.id, 'quantity': 1})
+        assert response.status_code == 200
+    db.session.expunge_all()
+
+    responses = []
+    count = count_statements(
+        lambda: responses.append(
+            client.get('/api/cart', headers=auth_headers)))
+
+    assert responses[0].status_code == 200
+    assert len(responses[0].json['items']) == lines
+    # auth user, cart, items joined to their products
+    assert count == 3
@@ -0,0 +1,79 @@
+from sqlalchemy import text
+
+from database.db import db
+from models.order import Order
+from models.payment import Payment
+from models.product import Product
+
+ADDRESS = {'street': '1 Main St', 'city': 'Springfield', 'state': 'IL',
+           'postal_code': '62701', 'country': 'US'}
+CARD = {'card_number': '4111111111111111', 'expiry': '12/30', 'cvv': '123',
+        'cardholder_name': 'Customer'}
+
+
+def checkout(client, headers, key):
+    return client.post('/api/orders/checkout',
+                       headers={**headers, 'Idempotency-Key': key},
+                       json={'shipping_address': ADDRESS,
+                             'billing_address': ADDRESS,
+                             'payment_details': CARD})
+
+
+def test_checkout_charges_the_sum_of_the_order_lines(client, auth_headers):
+    products = [Product('Apples', 'desc', 1.5, 10),
+                Product('Pears', 'desc', 2.25, 10)]
+    db.session.add_all(products)
+    db.session.commit()
+    for product, quantity in zip(products, (2, 3)):
+        client.post('/api/cart/add', headers=auth_headers,
+                    json={'product_id': product.id, 'quantity': quantity})
+    # A carts.subtotal out of step with the lines must not be charged
+    db.session.execute(text("UPDATE carts SET subtotal = 0.01"))
+    db.session.commit()
+
+    response = checkout(client, auth_headers, 'checkout-total-0001')
+
+    assert response.status_code == 201
+    order = db.session.scalars(db.select(Order)).one()
+    payment = db.session.scalars(db.select(Payment)).one()
+    assert order.total_amount == 9.75
+    assert payment.amount == 9.75
+
+
+def test_cart_totals_follow_the_lines(client, auth_headers):
+    product = Product('Apples', 'desc', 1.5, 10)
+    db.session.add(product)
+    db.session.commit()
+
+    client.post('/api/cart/add', headers=auth_headers,
+                json={'product_id': product.id, 'quantity': 2})
+    client.post('/api/cart/batch', headers=auth_headers,
+                json={'operations': [{'op': 'set', 'product_id': product.id,
+                                      'quantity': 5}]})
+
+    summary = client.get('/api/cart/summary', headers=auth_headers).json
+    assert summary['item_count'] == 5
+    assert summary['total'] == 7.5
+
+
+def test_order_etag_follows_embedded_rows(client, auth_headers):
+    product = Product('Apples', 'desc', 1.5, 10)
+    db.session.add(product)
+    db.session.commit()
+    client.post('/api/cart/add', headers=auth_headers,
+                json={'product_id': product.id, 'quantity': 2})
+    order_id = checkout(client, auth_headers, 'checkout-etag-0001').json[
+        'order_id']
+
+    first = client.get(f'/api/orders/{order_id}', headers=auth_headers)
+    etag = first.headers['ETag']
+    cached = client.get(f'/api/orders/{order_id}',
+                        headers={**auth_headers, 'If-None-Match': etag})
+    assert cached.status_code == 304
+
+    product.price = 2.0
+    db.session.commit()
+    changed = client.get(f'/api/orders/{order_id}',
+                         headers={**auth_headers, 'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
@@ -0,0 +1,24 @@
+import io
+import os
+
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from utils import image_handler
+
+
+def png_upload(filename):
+    data = io.BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(data, format='PNG')
+    data.seek(0)
+    return FileStorage(stream=data, filename=filename)
+
+
+def test_save_image_accepts_non_ascii_file_names(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(image_handler, 'UPLOAD_FOLDER', str(tmp_path))
+
+    for filename in ('图片.png', '.png'):
+        path = image_handler.save_image(png_upload(filename))
+
+        assert path.endswith('.png')
+        assert os.path.exists(tmp_path / os.path.basename(path))
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import pytest
+
+from database.db import db, unit_of_work
+from models.product import Product
+from repositories.product_repository import ProductRepository
+from services.inventory_service import InventoryService
+from services.registry import current_services
+
+
+def line(product, quantity):
+    return SimpleNamespace(product_id=product.id, quantity=quantity)
+
+
+def test_reserve_items_takes_nothing_when_a_product_is_short(app):
+    plenty = Product('Apples', 'desc', 1.0, 10)
+    scarce = Product('Pears', 'desc', 1.0, 1)
+    db.session.add_all([plenty, scarce])
+    db.session.commit()
+    service = InventoryService(ProductRepository())
+
+    with unit_of_work():
+        result = service.reserve_items([line(plenty, 3), line(scarce, 2)])
+
+    assert not result['success']
+    assert result['error'] == 'Insufficient stock for Pears'
+    stock = dict(db.session.query(Product.name, Product.stock).all())
+    assert stock == {'Apples': 10, 'Pears': 1}
+
+
+def test_reserve_items_takes_every_line(app):
+    apples = Product('Apples', 'desc', 1.0, 10)
+    pears = Product('Pears', 'desc', 1.0, 2)
+    db.session.add_all([apples, pears])
+    db.session.commit()
+    service = InventoryService(ProductRepository())
+
+    with unit_of_work():
+        result = service.reserve_items([line(apples, 3), line(pears, 2)])
+
+    assert result['success']
+    assert len(result['reservations']) == 2
+    stock = dict(db.session.query(Product.name, Product.stock).all())
+    assert stock == {'Apples': 7, 'Pears': 0}
+
+
+def test_bulk_adjust_stock_rejects_the_same_product_twice(app):
+    product = Product('Apples', 'desc', 1.0, 10)
+    db.session.add(product)
+    db.session.commit()
+    service = current_services().product_service
+
+    with pytest.raises(ValueError, match='Duplicate adjustment'):
+        service.bulk_adjust_stock([
+            {'product_id': product.id, 'delta': 5},
+            {'product_id': str(product.id), 'stock': 0}])
+
+    db.session.expire_all()
+    assert db.session.get(Product, product.id).stock == 10
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from database.db import db
+from models.inventory_reservation import InventoryReservation
+from models.order import Order
+from models.payment import Payment
+from models.product import Product
+from services.payment_executor import PaymentExecutor
+from services.registry import current_services
+from tests.test_checkout import checkout
+
+
+@pytest.fixture
+def product(client, auth_headers):
+    product = Product('Apples', 'desc', 2.0, 10)
+    db.session.add(product)
+    db.session.commit()
+    client.post('/api/cart/add', headers=auth_headers,
+                json={'product_id': product.id, 'quantity': 3})
+    return product
+
+
+def stock(product):
+    db.session.expire_all()
+    return db.session.get(Product, product.id).stock
+
+
+def only(model):
+    db.session.expire_all()
+    return db.session.scalars(db.select(model)).one()
+
+
+def test_timed_out_payment_stays_pending_and_is_reconciled(
+        client, auth_headers, product):
+    services = current_services()
+    processor = services.payment_service.payment_processor
+    processor.executor.timeout_seconds = 0.05
+    processor.payment_strategy.latency_seconds = 0.3
+
+    response = checkout(client, auth_headers, 'checkout-timeout-0001')
+
+    assert response.status_code == 202
+    assert only(Order).status == 'placed'
+    assert only(Payment).status == 'pending'
+    assert only(InventoryReservation).status == 'reserved'
+    assert stock(product) == 7
+
+    time.sleep(0.4)  # the gateway call completes after all
+    services.payment_reconciler.min_age_seconds = 0
+    result = services.payment_reconciler.reconcile()
+
+    assert result['settled'] == 1
+    assert only(Order).status == 'paid'
+    assert only(Payment).status == 'captured'
+    assert only(InventoryReservation).status == 'committed'
+    replay = checkout(client, auth_headers, 'checkout-timeout-0001')
+    assert replay.status_code == 201
+
+
+def test_busy_gateway_cancels_without_declining_and_frees_the_key(
+        client, auth_headers, product):
+    processor = current_services().payment_service.payment_processor
+    processor.executor = PaymentExecutor(
+        max_workers=1, max_in_flight=1, timeout_seconds=0.05)
+    release = threading.Event()
+    blocker = threading.Thread(
+        target=processor.executor.run, args=(release.wait,),
+        kwargs={'timeout': 5})
+    blocker.start()
+    time.sleep(0.05)
+
+    response = checkout(client, auth_headers, 'checkout-busy-00001')
+    release.set()
+    blocker.join()
+
+    assert response.status_code == 503
+    assert only(Order).status == 'cancelled'
+    assert only(Payment).status == 'cancelled'
+    assert stock(product) == 10
+
+    retry = checkout(client, auth_headers, 'checkout-busy-00001')
+    assert retry.status_code == 201
+
+
+def test_failure_after_payment_refunds_it(
+        app, client, auth_headers, product, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('invoice storage unavailable')
+    monkeypatch.setattr(
+        current_services().invoice_service, 'generate_invoice', fail)
+
+    response = checkout(client, auth_headers, 'checkout-refund-0001')
+
+    assert response.status_code == 400
+    assert response.json['error'].startswith('Checkout failed')
+    assert only(Order).status == 'cancelled'
+    payment = only(Payment)
+    assert payment.status == 'refunded'
+    assert payment.transaction_id
+    assert stock(product) == 10
@@ -0,0 +1,35 @@
+import io
+
+from database.db import db
+from models.product import Product
+from services.registry import current_services
+
+
+def import_feed(data, fmt='csv', batch_size=1):
+    return current_services().product_import_service.import_stream(
+        io.BytesIO(data), fmt, batch_size=batch_size)
+
+
+def test_invalid_utf8_keeps_committed_batches(app, monkeypatch):
+    services = current_services()
+    bumps = []
+    monkeypatch.setattr(services.catalog_cache, 'bump',
+                        lambda: bumps.append(True))
+
+    result = import_feed(b'name,price,stock\nApples,1.5,3\nPears,2,\xff\xfe\n')
+
+    assert result['imported'] == 1
+    assert result['failed'] == 1
+    assert 'Invalid UTF-8' in result['errors'][0]['error']
+    assert db.session.scalars(db.select(Product.name)).all() == ['Apples']
+    assert bumps
+
+
+def test_unreadable_csv_rows_are_reported(app):
+    field = b'x' * (1024 * 1024)
+    result = import_feed(
+        b'name,price,stock\n' + field + b',1,1\nNul\x00,1,1\nPears,2,4\n')
+
+    assert result['imported'] == 1
+    assert [error['row'] for error in result['errors']] == [2, 3]
+    assert db.session.scalars(db.select(Product.name)).all() == ['Pears']
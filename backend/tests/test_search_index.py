@@ -0,0 +1,33 @@
+import time
+
+from database.db import db
+from models.product import Product
+from services.registry import current_services
+
+
+def wait_for_rebuild(index):
+    deadline = time.monotonic() + 5
+    while index._changes is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_expired_index_is_rebuilt_in_the_background(app):
+    index = current_services().product_search_index
+    db.session.add(Product('Green apple', 'fruit', 1.0, 5))
+    db.session.commit()
+    assert index.search('apple')[1] == 1
+
+    # Written by another process: only a rebuild picks it up
+    db.session.add(Product('Red apple', 'fruit', 1.0, 5))
+    db.session.commit()
+    index.invalidate()
+    # Made by this process while the rebuild runs
+    pear = Product('Apple pear', 'fruit', 1.0, 5)
+    db.session.add(pear)
+    db.session.commit()
+
+    assert index.search('apple')[1] == 1  # served from the old index
+    index.index_product(pear)
+    wait_for_rebuild(index)
+
+    assert index.search('apple')[1] == 3
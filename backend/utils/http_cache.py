@@ -0,0 +1,47 @@
+import hashlib
+
+from flask import current_app, jsonify, request
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag value from version-like parts (ids, timestamps...)"""
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def not_modified(etag: str):
+    """Return a 304 response if the client already holds etag, else None"""
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def conditional_json(etag: str, build):
+    """
+    Answer with 304 when If-None-Match matches etag, otherwise serialize
+    build() as JSON. build is only called when a body is actually needed.
+    """
+    response = not_modified(etag)
+    if response is not None:
+        return response
+
+    response = jsonify(build())
+    response.set_etag(etag)
+    return response
+
+
+def hashed_json(build):
+    """
+    Serialize build() and use a hash of the body as its ETag, for
+    responses that embed rows with versions of their own
+    """
+    body = current_app.json.dumps(build())
+    etag = make_etag(body)
+    response = not_modified(etag)
+    if response is None:
+        response = current_app.response_class(
+            body, mimetype='application/json')
+        response.set_etag(etag)
+    return response
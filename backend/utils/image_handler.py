@@ -1,13 +1,36 @@
+import hashlib
 import os
-from werkzeug.utils import secure_filename
+import re
 import uuid
 
+from PIL import Image, ImageOps
+
+from services.registry import current_services
+
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 UPLOAD_FOLDER = os.path.join(
     os.path.dirname(
         os.path.dirname(__file__)),
     'static',
     'product_images')
+IMAGE_URL_PREFIX = '/static/product_images/'
+
+# Resized variants generated in the background after each upload.
+# Files are named <original filename>.<variant>.<format extension>
+VARIANT_SIZES = {
+    'thumbnail': (150, 150),
+    'card': (400, 400),
+    'detail': (800, 800),
+}
+VARIANT_FORMATS = {
+    'webp': 'WEBP',
+    'jpg': 'JPEG',
+}
+
+HASH_CHUNK_SIZE = 64 * 1024
+CONTENT_ADDRESSED_PATTERN = re.compile(
+    r'^[0-9a-f]{64}\.(png|jpg|jpeg|gif)'
+    r'(\.(thumbnail|card|detail)\.(webp|jpg))?$')
 
 
 def allowed_file(filename):
@@ -16,19 +39,121 @@ def allowed_file(filename):
 
 
 def save_image(file):
+    """
+    Store an upload under the SHA-256 of its content, so identical uploads
+    share one file on disk and a file name never changes meaning
+    """
     if not file or not allowed_file(file.filename):
         return None
 
-    # Generate unique filename
-    filename = secure_filename(file.filename)
-    unique_filename = f"{uuid.uuid4()}_{filename}"
+    # secure_filename would drop the dot from names like '图片.png'
+    extension = file.filename.rsplit('.', 1)[1].lower()
 
-    # Save file
-    file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
-    file.save(file_path)
+    # Hash while streaming to a temp file, then move into place
+    digest = hashlib.sha256()
+    temp_path = os.path.join(UPLOAD_FOLDER, f".upload-{uuid.uuid4()}")
+    with open(temp_path, 'wb') as temp_file:
+        for chunk in iter(lambda: file.stream.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            temp_file.write(chunk)
+
+    content_filename = f"{digest.hexdigest()}.{extension}"
+    file_path = os.path.join(UPLOAD_FOLDER, content_filename)
+    if os.path.exists(file_path):
+        # Same bytes already stored: keep the existing file
+        os.remove(temp_path)
+    else:
+        os.replace(temp_path, file_path)
+
+    if not os.path.exists(_variant_path(file_path, 'detail', 'webp')):
+        # Resize off the request thread
+        current_services().image_executor.submit(generate_variants, file_path)
 
     # Return relative path for storage in database
-    return os.path.join('static', 'product_images', unique_filename)
+    return os.path.join('static', 'product_images', content_filename)
+
+
+def is_content_addressed(filename):
+    """True for content-hash file names (originals and their variants)"""
+    return bool(CONTENT_ADDRESSED_PATTERN.match(filename))
+
+
+def generate_variants(file_path):
+    """Write every size/format variant of an uploaded original"""
+    try:
+        with Image.open(file_path) as original:
+            original = ImageOps.exif_transpose(original)
+            if original.mode not in ('RGB', 'RGBA'):
+                original = original.convert('RGBA')
+
+            for variant, size in VARIANT_SIZES.items():
+                resized = original.copy()
+                resized.thumbnail(size, Image.LANCZOS)
+                for extension, image_format in VARIANT_FORMATS.items():
+                    image = resized
+                    if image_format == 'JPEG' and image.mode != 'RGB':
+                        # JPEG has no alpha channel; flatten onto white
+                        background = Image.new('RGB', image.size, 'white')
+                        background.paste(image, mask=image.getchannel('A'))
+                        image = background
+                    _save_atomically(
+                        image,
+                        _variant_path(file_path, variant, extension),
+                        image_format)
+    except Exception as e:
+        print(f"Error generating image variants for {file_path}: {e}")
+
+
+def _variant_path(file_path, variant, extension):
+    return f"{file_path}.{variant}.{extension}"
+
+
+def _save_atomically(image, target_path, image_format):
+    # Write to a temp file first so a half-written variant is never served
+    temp_path = f"{target_path}.{uuid.uuid4().hex}.tmp"
+    image.save(temp_path, format=image_format, quality=85, optimize=True)
+    os.replace(temp_path, target_path)
+
+
+def image_url(image_path):
+    """Public URL for a stored image path (or an external URL)"""
+    if not image_path:
+        return None
+    if image_path.startswith(('http://', 'https://')):
+        return image_path
+    return IMAGE_URL_PREFIX + os.path.basename(image_path)
+
+
+def variant_urls(image_path):
+    """
+    URLs of the resized variants of a locally stored image, e.g.
+    {'thumbnail': {'webp': ..., 'jpg': ...}, ...}. None for external images.
+    """
+    if not image_path or image_path.startswith(('http://', 'https://')):
+        return None
+    base_url = image_url(image_path)
+    return {
+        variant: {
+            extension: f"{base_url}.{variant}.{extension}"
+            for extension in VARIANT_FORMATS
+        }
+        for variant in VARIANT_SIZES
+    }
+
+
+def resolve_image_file(filename):
+    """
+    Map a requested file name to one that exists on disk. A variant that
+    is still being generated falls back to its original.
+    """
+    if os.path.exists(os.path.join(UPLOAD_FOLDER, filename)):
+        return filename
+
+    parts = filename.rsplit('.', 2)
+    if (len(parts) == 3 and parts[1] in VARIANT_SIZES
+            and parts[2] in VARIANT_FORMATS):
+        return parts[0]
+    return filename
 
 
 def delete_image(image_path):
@@ -40,7 +165,13 @@ def delete_image(image_path):
             os.path.dirname(
                 os.path.dirname(__file__)),
             image_path)
-        if os.path.exists(full_path):
-            os.remove(full_path)
+        paths = [full_path] + [
+            _variant_path(full_path, variant, extension)
+            for variant in VARIANT_SIZES
+            for extension in VARIANT_FORMATS
+        ]
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
     except Exception as e:
         print(f"Error deleting image: {e}")
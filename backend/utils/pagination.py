@@ -0,0 +1,30 @@
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(values):
+    """Encode keyset values (e.g. [price, id]) into an opaque cursor string"""
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor. Raises ValueError if invalid."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or not values:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def clamp_limit(limit):
+    """Keep a requested page size within sane bounds"""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))